@@ -6,20 +6,34 @@ Usage:
   python demo.py           # default verbosity (INFO-level logs suppressed)
   python demo.py -v        # verbosity = 1 (INFO for llmextract)
   python demo.py -vv       # verbosity = 2 (DEBUG) — shows raw LLM outputs
+  python demo.py --sync    # also run the synchronous extract() path
 You can also set LLME_FORCE_SIMULATE=1 in the environment to skip external calls.
+Simulated extraction uses pyahocorasick for single-pass matching when installed.
 """
 
 from __future__ import annotations
 
 import argparse
 import asyncio
+import contextlib
 import os
 import re
 import time
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from dotenv import load_dotenv
 
+try:
+    import ahocorasick  # type: ignore
+except ImportError:
+    ahocorasick = None
+
+try:
+    import httpx  # type: ignore
+except ImportError:
+    httpx = None
+
 from llmextract import (
     AnnotatedDocument,
     CharInterval,
@@ -49,6 +63,20 @@ def build_provider_kwargs(doc_id: str) -> Dict[str, Any]:
     return pk
 
 
+@lru_cache(maxsize=1024)
+def _compiled_needle(needle: str) -> "re.Pattern[str]":
+    return re.compile(re.escape(needle), re.IGNORECASE)
+
+
+@lru_cache(maxsize=64)
+def _needle_automaton(needles: Tuple[str, ...]) -> Any:
+    automaton = ahocorasick.Automaton()
+    for needle in needles:
+        automaton.add_word(needle, needle)
+    automaton.make_automaton()
+    return automaton
+
+
 def simulate_extraction(
     doc_id: str,
     model_name: str,
@@ -58,21 +86,58 @@ def simulate_extraction(
 ) -> AnnotatedDocument:
     found: List[Extraction] = []
 
+    # Scan each distinct needle once; hits are then emitted per example
+    # extraction, in example order, as if each had scanned the text itself.
+    sources: List[Tuple[Extraction, str]] = []
+    needles: Dict[str, str] = {}
     for ex in examples:
         for example_ex in ex.extractions:
             needle = example_ex.extraction_text or ""
             if not needle.strip():
                 continue
-            for m in re.finditer(re.escape(needle), text, flags=re.IGNORECASE):
-                s, e = m.start(), m.end()
-                found.append(
-                    Extraction(
-                        extraction_class=example_ex.extraction_class,
-                        extraction_text=text[s:e],
-                        attributes=example_ex.attributes or {},
-                        char_interval=CharInterval(start=s, end=e),
-                    )
+            key = needle.lower()
+            sources.append((example_ex, key))
+            needles.setdefault(key, needle)
+    hits: Dict[str, List[Tuple[int, int]]] = {key: [] for key in needles}
+
+    text_lower = text.lower()
+    # Lowercasing can change length for a few code points; offsets into
+    # text_lower are only valid for text when the lengths agree.
+    if len(text_lower) != len(text):
+        for key, needle in needles.items():
+            hits[key] = [
+                (m.start(), m.end()) for m in _compiled_needle(needle).finditer(text)
+            ]
+    elif ahocorasick is not None and needles:
+        automaton = _needle_automaton(tuple(needles))
+        # The automaton reports overlapping hits; keep per needle only those
+        # starting at or after the previous kept hit's end, as the find sweep does.
+        for end, key in automaton.iter(text_lower):
+            start = end - len(key) + 1
+            key_hits = hits[key]
+            if key_hits and start < key_hits[-1][1]:
+                continue
+            key_hits.append((start, end + 1))
+    else:
+        # Needles are literals, so a plain str.find sweep replaces the regex.
+        for key, key_hits in hits.items():
+            pos = text_lower.find(key)
+            while pos != -1:
+                key_hits.append((pos, pos + len(key)))
+                pos = text_lower.find(key, pos + len(key))
+
+    # Offsets come straight from the matcher and the example fields were
+    # validated when the examples were built, so skip re-validation.
+    for example_ex, key in sources:
+        for s, e in hits[key]:
+            found.append(
+                Extraction.model_construct(
+                    extraction_class=example_ex.extraction_class,
+                    extraction_text=text[s:e],
+                    attributes=dict(example_ex.attributes or {}),
+                    char_interval=CharInterval.model_construct(start=s, end=e),
                 )
+            )
 
     metadata = {
         "model_name": model_name,
@@ -134,6 +199,7 @@ def run_sync_task(
             retries=int(os.getenv("LLME_RETRIES", "2")),
             retry_backoff=float(os.getenv("LLME_RETRY_BACKOFF", "0.5")),
             dedupe=True,
+            cache=True,
         )
         took = time.time() - start
         print(f"Sync extraction completed in {took:.2f}s")
@@ -149,7 +215,7 @@ def run_sync_task(
         return None
 
 
-def run_async_task(
+async def run_async_task(
     doc_id: str,
     model_name: str,
     prompt: str,
@@ -157,44 +223,86 @@ def run_async_task(
     text: str,
     provider_kwargs: Dict[str, Any],
     *,
-    simulate_on_fail: bool = True,
+    max_concurrency: int = 4,
     verbose: int = 1,
-) -> Optional[AnnotatedDocument]:
-    print("\n" + ("-" * 60))
+) -> AnnotatedDocument:
     print(f"Running async extraction for doc_id='{doc_id}' model='{model_name}'")
     start = time.time()
 
-    async def _run_async():
-        return await aextract(
-            text=text,
-            prompt_description=prompt,
-            examples=examples,
-            model_name=model_name,
-            provider_kwargs=provider_kwargs,
-            chunk_size=int(os.getenv("LLME_CHUNK_SIZE", "500")),
-            chunk_overlap=int(os.getenv("LLME_CHUNK_OVERLAP", "50")),
-            max_concurrency=int(os.getenv("LLME_MAX_CONCURRENCY", "4")),
-            verbose=verbose,
-            error_mode="return",
-            retries=int(os.getenv("LLME_RETRIES", "2")),
-            retry_backoff=float(os.getenv("LLME_RETRY_BACKOFF", "0.5")),
-            dedupe=True,
+    doc = await aextract(
+        text=text,
+        prompt_description=prompt,
+        examples=examples,
+        model_name=model_name,
+        provider_kwargs=provider_kwargs,
+        chunk_size=int(os.getenv("LLME_CHUNK_SIZE", "500")),
+        chunk_overlap=int(os.getenv("LLME_CHUNK_OVERLAP", "50")),
+        max_concurrency=max_concurrency,
+        verbose=verbose,
+        error_mode="return",
+        retries=int(os.getenv("LLME_RETRIES", "2")),
+        retry_backoff=float(os.getenv("LLME_RETRY_BACKOFF", "0.5")),
+        dedupe=True,
+        cache=True,
+    )
+    took = time.time() - start
+    print(f"Async extraction for '{doc_id}'/'{model_name}' completed in {took:.2f}s")
+    return doc
+
+
+async def run_async_tasks(
+    jobs: List[Dict[str, Any]], *, verbose: int = 1
+) -> List[Union[AnnotatedDocument, BaseException]]:
+    """
+    Run every async extraction concurrently on a single event loop.
+
+    When httpx is available, one AsyncClient is shared by all jobs so
+    connections (and TLS sessions) are reused instead of re-established per call.
+    LLME_MAX_CONCURRENCY bounds the LLM requests in flight across all jobs:
+    it is split between concurrent jobs and each job's chunk fan-out (one job
+    fans out to the full limit, many jobs run that many at once with one
+    request each), and the shared client's pool is sized to match. Per-chunk
+    retries with exponential backoff are handled inside aextract.
+
+    Results are returned in job order; a failed job yields its exception.
+    """
+    limit = max(1, int(os.getenv("LLME_MAX_CONCURRENCY", "4")))
+    job_slots = max(1, min(limit, len(jobs)))
+    per_job = max(1, limit // job_slots)
+    sem = asyncio.Semaphore(job_slots)
+
+    async def _bounded(coro: Any) -> AnnotatedDocument:
+        async with sem:
+            return await coro
+
+    if httpx is not None:
+        client_cm: Any = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=limit, max_keepalive_connections=limit)
         )
-
-    try:
-        doc = asyncio.run(_run_async())
-        took = time.time() - start
-        print(f"Async extraction completed in {took:.2f}s")
-        pretty_print_doc(doc)
-        return doc
-    except Exception as e:
-        print(f"Async extraction failed for model='{model_name}' doc='{doc_id}': {e}")
-        if simulate_on_fail:
-            print("Falling back to simulated extraction (offline).")
-            sim = simulate_extraction(doc_id, model_name, prompt, examples, text)
-            pretty_print_doc(sim)
-            return sim
-        return None
+    else:
+        client_cm = contextlib.nullcontext()
+
+    async with client_cm as client:
+        coros = []
+        for job in jobs:
+            provider_kwargs = dict(job["provider_kwargs"])
+            if client is not None:
+                provider_kwargs["http_async_client"] = client
+            coros.append(
+                _bounded(
+                    run_async_task(
+                        doc_id=job["doc_id"],
+                        model_name=job["model_name"],
+                        prompt=job["prompt"],
+                        examples=job["examples"],
+                        text=job["text"],
+                        provider_kwargs=provider_kwargs,
+                        max_concurrency=per_job,
+                        verbose=verbose,
+                    )
+                )
+            )
+        return await asyncio.gather(*coros, return_exceptions=True)
 
 
 def main() -> None:
@@ -208,6 +316,11 @@ def main() -> None:
         default=None,
         help="Increase verbosity: -v INFO, -vv DEBUG (raw LLM output)",
     )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Also run the synchronous extract() for every task/model (slower)",
+    )
     args = parser.parse_args()
 
     # verbosity: CLI overrides env variable if provided
@@ -273,70 +386,77 @@ def main() -> None:
     ]
 
     all_results: List[AnnotatedDocument] = []
+    jobs: List[Dict[str, Any]] = [
+        {
+            "doc_id": task["doc_id"],
+            "model_name": model_name,
+            "prompt": task["prompt"],
+            "examples": task["examples"],
+            "text": task["text"],
+            "provider_kwargs": build_provider_kwargs(task["doc_id"]),
+        }
+        for task in tasks
+        for model_name in models_to_try
+    ]
 
-    for task in tasks:
-        for model_name in models_to_try:
-            doc_id = task["doc_id"]
-            provider_kwargs = build_provider_kwargs(doc_id)
-            simulate_mode = force_simulate
-
-            # Sync run
-            try:
-                result_sync = None
-                if not simulate_mode:
+    if force_simulate:
+        print("Force-simulate enabled; running simulated extractions.")
+        for job in jobs:
+            all_results.append(
+                simulate_extraction(
+                    job["doc_id"],
+                    job["model_name"],
+                    job["prompt"],
+                    job["examples"],
+                    job["text"],
+                )
+            )
+    else:
+        if args.sync:
+            for job in jobs:
+                try:
                     result_sync = run_sync_task(
-                        doc_id=doc_id,
-                        model_name=model_name,
-                        prompt=task["prompt"],
-                        examples=task["examples"],
-                        text=task["text"],
-                        provider_kwargs=provider_kwargs,
+                        doc_id=job["doc_id"],
+                        model_name=job["model_name"],
+                        prompt=job["prompt"],
+                        examples=job["examples"],
+                        text=job["text"],
+                        provider_kwargs=job["provider_kwargs"],
                         simulate_on_fail=True,
                         verbose=verbosity,
                     )
-                else:
-                    print("Force-simulate enabled; running simulated sync extraction.")
-                    result_sync = simulate_extraction(
-                        doc_id,
-                        model_name,
-                        task["prompt"],
-                        task["examples"],
-                        task["text"],
-                    )
-
-                if result_sync:
-                    all_results.append(result_sync)
-            except Exception as e:
-                print(f"Error during sync run for model {model_name}: {e}")
-
-            # Async run (separate)
-            try:
-                result_async = None
-                if not simulate_mode:
-                    result_async = run_async_task(
-                        doc_id=doc_id,
-                        model_name=model_name,
-                        prompt=task["prompt"],
-                        examples=task["examples"],
-                        text=task["text"],
-                        provider_kwargs=provider_kwargs,
-                        simulate_on_fail=True,
-                        verbose=verbosity,
-                    )
-                else:
-                    print("Force-simulate enabled; running simulated async extraction.")
-                    result_async = simulate_extraction(
-                        doc_id,
-                        model_name,
-                        task["prompt"],
-                        task["examples"],
-                        task["text"],
-                    )
-
-                if result_async:
-                    all_results.append(result_async)
-            except Exception as e:
-                print(f"Error during async run for model {model_name}: {e}")
+                    if result_sync:
+                        all_results.append(result_sync)
+                except Exception as e:
+                    print(f"Error during sync run for model {job['model_name']}: {e}")
+
+        # All async runs share one event loop and execute concurrently
+        print("\n" + ("-" * 60))
+        print(f"Running {len(jobs)} async extraction(s) concurrently")
+        start = time.time()
+        try:
+            async_results = asyncio.run(run_async_tasks(jobs, verbose=verbosity))
+        except Exception as e:
+            print(f"Error during async runs: {e}")
+            async_results = [e] * len(jobs)
+        print(f"Async extractions finished in {time.time() - start:.2f}s")
+
+        for job, result in zip(jobs, async_results):
+            if isinstance(result, BaseException):
+                print(
+                    f"Async extraction failed for model='{job['model_name']}' "
+                    f"doc='{job['doc_id']}': {result}"
+                )
+                print("Falling back to simulated extraction (offline).")
+                result = simulate_extraction(
+                    job["doc_id"],
+                    job["model_name"],
+                    job["prompt"],
+                    job["examples"],
+                    job["text"],
+                )
+            pretty_print_doc(result)
+            all_results.append(result)
 
     if all_results:
         out_file = os.getenv("LLME_OUTPUT_FILE", "llmextract_report.html")
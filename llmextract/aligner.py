@@ -1,15 +1,41 @@
 # llmextract/aligner.py
 import difflib
 import logging
+import math
+from bisect import bisect_left
 import re
 import unicodedata
-from typing import List, Optional, Tuple
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
 
 from .data_models import CharInterval, Extraction
 
+try:
+    import ahocorasick  # type: ignore
+except ImportError:
+    ahocorasick = None
+
+try:
+    from rapidfuzz import fuzz as _rf_fuzz, process as _rf_process  # type: ignore
+except ImportError:
+    _rf_fuzz = None
+    _rf_process = None
+
 logger = logging.getLogger(__name__)
 
+# Zero-width space/non-joiner/joiner and BOM, deleted by str.translate.
+_ZERO_WIDTH_TABLE = str.maketrans("", "", "\u200b\u200c\u200d\ufeff")
+
+# Character n-gram size for the fuzzy-fallback prefilter. Bigrams give the
+# tightest safe bound at the default threshold; longer n-grams break more per edit.
+_NGRAM_SIZE = 2
+
+# Below this many distinct needles, per-extraction str.find beats building an automaton.
+_MIN_NEEDLES_FOR_INDEX = 4
 
+
+@lru_cache(maxsize=4096)
 def _clean_for_pattern(s: Optional[str]) -> str:
     """
     Normalize input for pattern building:
@@ -21,11 +47,169 @@ def _clean_for_pattern(s: Optional[str]) -> str:
     if s is None:
         return ""
     s = unicodedata.normalize("NFC", s)
-    # remove zero-width and BOM characters
-    zero_width_chars = (chr(0x200B), chr(0x200C), chr(0x200D), chr(0xFEFF))
-    for zw in zero_width_chars:
-        s = s.replace(zw, "")
-    return s
+    # remove zero-width and BOM characters in a single pass
+    return s.translate(_ZERO_WIDTH_TABLE)
+
+
+@lru_cache(maxsize=4096)
+def _flex_pattern(s: str) -> "re.Pattern[str]":
+    """
+    Compile a case-insensitive pattern for s that treats any whitespace run as
+    the regex '\\s+'. Cached because the same extraction texts recur often.
+    """
+    tokens = [re.escape(t) for t in s.split()]
+    if tokens:
+        return re.compile(r"\b" + r"\s+".join(tokens) + r"\b", re.IGNORECASE)
+    return re.compile(re.escape(s), re.IGNORECASE)
+
+
+def _index_occurrences(
+    needle_counts: Dict[str, int], haystack: str
+) -> Dict[str, List[int]]:
+    """
+    Map needles to the sorted start offsets of all their (possibly
+    overlapping) occurrences in haystack.
+
+    With pyahocorasick and enough distinct needles, every needle is indexed in
+    a single pass. Otherwise only needles requested more than once are indexed,
+    each with one str.find sweep shared by all of its duplicates; needles left
+    out of the mapping are looked up with plain str.find.
+    """
+    if ahocorasick is not None and len(needle_counts) >= _MIN_NEEDLES_FOR_INDEX:
+        automaton = ahocorasick.Automaton()
+        for needle in needle_counts:
+            automaton.add_word(needle, needle)
+        automaton.make_automaton()
+
+        positions: Dict[str, List[int]] = {needle: [] for needle in needle_counts}
+        for end, needle in automaton.iter(haystack):
+            positions[needle].append(end - len(needle) + 1)
+        return positions
+
+    positions = {}
+    for needle, count in needle_counts.items():
+        if count < 2:
+            continue
+        found: List[int] = []
+        pos = haystack.find(needle)
+        while pos != -1:
+            found.append(pos)
+            pos = haystack.find(needle, pos + 1)
+        positions[needle] = found
+    return positions
+
+
+def _trusted_interval(start: int, end: int) -> CharInterval:
+    """
+    Build a CharInterval from offsets computed here, skipping Pydantic
+    validation; only the 0 <= start < end invariant is checked.
+    """
+    if not 0 <= start < end:
+        raise ValueError(f"invalid interval [{start}:{end}]")
+    return CharInterval.model_construct(start=start, end=end)
+
+
+def _char_ngrams(s: str) -> Set[str]:
+    return {s[i : i + _NGRAM_SIZE] for i in range(len(s) - _NGRAM_SIZE + 1)}
+
+
+def _required_shared_ngrams(m: int, max_window: int, threshold: float) -> int:
+    """
+    How many of the m - q + 1 positional n-grams of an m-char extraction must
+    occur in the text for a window of at most max_window chars to reach
+    threshold (q = _NGRAM_SIZE).
+
+    A window of n chars with ratio >= threshold shares an in-order subsequence
+    of M >= threshold * (m + n) / 2 chars with the extraction. Each of the
+    m - M unmatched extraction chars breaks at most q n-grams, and each of the
+    at most n - M gaps between matched chars breaks at most q - 1. That bound
+    is linear in n, so its maximum lies at an end of the feasible range of n.
+    """
+    q = _NGRAM_SIZE
+    total = m - q + 1
+    if threshold <= 0.0 or total <= 0:
+        return 0
+    if threshold >= 1.0:
+        return total
+    lo = threshold * m / (2.0 - threshold)
+    hi = min(float(max_window), (2.0 - threshold) * m / threshold)
+    if lo > hi:
+        return total
+
+    def broken(n: float) -> float:
+        matched = threshold * (m + n) / 2.0
+        return q * (m - matched) + (q - 1) * (n - matched)
+
+    return total - math.floor(max(broken(lo), broken(hi)) + 1e-9)
+
+
+def _find_at_or_after(
+    haystack: str, needle: str, pos: int, positions: Optional[List[int]]
+) -> int:
+    """str.find(needle, pos) semantics, answered from positions when indexed."""
+    if positions is None:
+        return haystack.find(needle, pos)
+    k = bisect_left(positions, pos)
+    return positions[k] if k < len(positions) else -1
+
+
+def _block_anchored_starts(needle: str, haystack: str) -> List[int]:
+    """
+    Window starts for needle around every occurrence in haystack of the longest
+    block the two share. Insertions or deletions outside the block shift the
+    true start by at most the unmatched length, so each occurrence contributes
+    the offsets within that distance of its alignment.
+    """
+    matcher = difflib.SequenceMatcher(None, haystack, needle, autojunk=False)
+    block = matcher.find_longest_match(0, len(haystack), 0, len(needle))
+    if not block.size:
+        return []
+    shared = needle[block.b : block.b + block.size]
+    slack = len(needle) - block.size
+    starts: Dict[int, None] = {}
+    pos = haystack.find(shared)
+    while pos != -1:
+        anchor = pos - block.b
+        starts.update(
+            dict.fromkeys(range(max(0, anchor - slack), max(0, anchor + slack + 1)))
+        )
+        pos = haystack.find(shared, pos + 1)
+    return list(starts)
+
+
+def _best_fuzzy_window(
+    needle: str, haystack: str, spans: List[Tuple[int, int]], score_cutoff: float
+) -> Tuple[float, Optional[Tuple[int, int]]]:
+    """
+    Return (ratio, span) for the span of haystack most similar to needle.
+
+    Uses rapidfuzz when installed and difflib.SequenceMatcher otherwise; ratio
+    is in [0, 1]. Spans scoring below score_cutoff may be reported as no match.
+    """
+    if not spans:
+        return 0.0, None
+
+    if _rf_process is not None and _rf_fuzz is not None:
+        best = _rf_process.extractOne(
+            needle,
+            [haystack[s:e] for s, e in spans],
+            scorer=_rf_fuzz.ratio,
+            processor=None,
+            score_cutoff=min(max(score_cutoff, 0.0), 1.0) * 100,
+        )
+        if best is None:
+            return 0.0, None
+        _, score, index = best
+        return score / 100.0, spans[index]
+
+    best_ratio = 0.0
+    best_span: Optional[Tuple[int, int]] = None
+    for s, e in spans:
+        ratio = difflib.SequenceMatcher(None, needle, haystack[s:e]).ratio()
+        if ratio > best_ratio:
+            best_ratio = ratio
+            best_span = (s, e)
+    return best_ratio, best_span
 
 
 def align_extractions(
@@ -40,14 +224,27 @@ def align_extractions(
       1) Exact, case-insensitive substring search starting from last match end.
       2) Exact, case-insensitive global search.
       3) Regex search that treats whitespace runs as the regex '\\s+' (flexible spacing).
-      4) A lightweight fuzzy-match fallback using difflib.SequenceMatcher.
+      4) A fuzzy-match fallback scoring windows anchored on the longest token, or
+         on each occurrence of the longest block shared with the text, then on
+         windows sampled across the text (rapidfuzz or difflib).
 
-    If alignment fails for an extraction, its char_interval is left as None.
+    Extractions are updated in place and returned in input order. If alignment
+    fails for an extraction, its char_interval is left as None.
     """
 
     lower_original = original_text.lower()
     last_match_end = 0
-    aligned: List[Extraction] = []
+
+    # Repeated extraction texts (e.g. the same name extracted twice) share one
+    # occurrence scan instead of each searching the text again.
+    needle_counts = Counter(
+        _clean_for_pattern(ext.extraction_text).lower()
+        for ext in extractions
+        if ext.extraction_text and ext.extraction_text.strip()
+    )
+    needle_counts.pop("", None)
+    occurrences = _index_occurrences(needle_counts, lower_original)
+    doc_ngrams: Optional[Set[str]] = None
 
     for idx, extraction in enumerate(extractions):
         raw_text = extraction.extraction_text
@@ -55,23 +252,25 @@ def align_extractions(
             logger.warning(
                 "Skipping alignment for empty extraction_text (index=%d).", idx
             )
-            aligned.append(extraction)
             continue
 
         normalized_raw = _clean_for_pattern(raw_text)
         lower_search = normalized_raw.lower()
 
+        positions = occurrences.get(lower_search)
         start_index: int = -1
 
         # 1) Direct in-order search
         try:
-            start_index = lower_original.find(lower_search, last_match_end)
+            start_index = _find_at_or_after(
+                lower_original, lower_search, last_match_end, positions
+            )
         except Exception:
             start_index = -1
 
         # 2) Fallback to global search
         if start_index == -1:
-            start_index = lower_original.find(lower_search)
+            start_index = _find_at_or_after(lower_original, lower_search, 0, positions)
             if start_index != -1:
                 logger.debug(
                     "Extraction '%s' found out of order (index=%d); fell back to full-text search.",
@@ -82,14 +281,7 @@ def align_extractions(
         # 3) Regex with flexible whitespace
         if start_index == -1:
             try:
-                tokens = [t for t in re.split(r"\s+", normalized_raw) if t]
-                if tokens:
-                    token_patterns = [re.escape(tok) for tok in tokens]
-                    pattern = r"\b" + r"\s+".join(token_patterns) + r"\b"
-                else:
-                    pattern = re.escape(normalized_raw)
-
-                m = re.search(pattern, original_text, flags=re.IGNORECASE)
+                m = _flex_pattern(normalized_raw).search(original_text)
             except re.error as e:
                 logger.debug(
                     "Regex build/search failed for extraction '%s': %s", raw_text, e
@@ -99,7 +291,7 @@ def align_extractions(
             if m:
                 sidx, eidx = m.start(), m.end()
                 try:
-                    extraction.char_interval = CharInterval(start=sidx, end=eidx)
+                    extraction.char_interval = _trusted_interval(sidx, eidx)
                     logger.debug(
                         "Aligned extraction via regex (index=%d): '%s' -> [%d:%d]",
                         idx,
@@ -109,7 +301,6 @@ def align_extractions(
                     )
                     if sidx >= last_match_end:
                         last_match_end = eidx
-                    aligned.append(extraction)
                     continue
                 except Exception as e:
                     logger.warning(
@@ -122,43 +313,86 @@ def align_extractions(
         # 4) Fuzzy fallback
         if start_index == -1:
             lowered = lower_search
-            tokens = [t for t in re.split(r"\s+", lowered) if t]
             candidates: List[int] = []
+            fallback: List[int] = []
 
-            # find anchor positions for the longest token
-            if tokens:
-                longest_token = max(tokens, key=len)
-                if len(longest_token) >= 4:
-                    pos = 0
-                    while True:
-                        pos = lower_original.find(longest_token, pos)
-                        if pos == -1:
-                            break
-                        candidates.append(pos)
-                        pos += max(1, len(longest_token))
-
-            # if none found, sample windows across the document
-            if not candidates:
-                step = max(1, len(lowered) // 10)
-                candidates = list(range(0, max(1, len(lower_original) - 1), step))
+            target_len = max(1, int(len(lowered) * 1.2))
+
+            # Cheap rejection: too few of the extraction's n-grams occur
+            # anywhere in the text for any window to reach the fuzzy threshold.
+            too_long = len(lowered) > len(lower_original)
+            shared = required = 0
+            if not too_long:
+                required = _required_shared_ngrams(
+                    len(lowered), target_len, fuzzy_threshold
+                )
+                if required > 0:
+                    if doc_ngrams is None:
+                        doc_ngrams = _char_ngrams(lower_original)
+                    shared = sum(
+                        lowered[i : i + _NGRAM_SIZE] in doc_ngrams
+                        for i in range(len(lowered) - _NGRAM_SIZE + 1)
+                    )
+
+            if too_long:
+                logger.debug(
+                    "Skipping fuzzy match for extraction (index=%d): longer than the text",
+                    idx,
+                )
+            elif shared < required:
+                logger.debug(
+                    "Skipping fuzzy match for extraction (index=%d): %d of %d required n-grams shared",
+                    idx,
+                    shared,
+                    required,
+                )
+            else:
+                tokens = lowered.split()
+
+                # find anchor positions for the longest token
+                if tokens:
+                    longest_token = max(tokens, key=len)
+                    if len(longest_token) >= 4:
+                        pos = 0
+                        while True:
+                            pos = lower_original.find(longest_token, pos)
+                            if pos == -1:
+                                break
+                            candidates.append(pos)
+                            pos += max(1, len(longest_token))
+
+                # otherwise anchor on the longest block the extraction shares
+                # with the document, keeping windows sampled across the whole
+                # document for when no anchored window reaches the threshold
+                if not candidates:
+                    step = max(1, len(lowered) // 10)
+                    sampled = list(range(0, max(1, len(lower_original) - 1), step))
+                    candidates = _block_anchored_starts(lowered, lower_original)
+                    if len(candidates) < len(sampled):
+                        fallback = sampled
+                    else:
+                        candidates = sampled
 
             best_ratio = 0.0
             best_span: Optional[Tuple[int, int]] = None
-            for cand in candidates:
-                target_len = max(1, int(len(lowered) * 1.2))
-                cand_end = min(len(lower_original), cand + target_len)
-                candidate_sub = lower_original[cand:cand_end]
-                if not candidate_sub:
+            for starts in (candidates, fallback):
+                if not starts:
                     continue
-                ratio = difflib.SequenceMatcher(None, lowered, candidate_sub).ratio()
-                if ratio > best_ratio:
-                    best_ratio = ratio
-                    best_span = (cand, cand_end)
+                spans = [
+                    (cand, min(len(lower_original), cand + target_len))
+                    for cand in starts
+                    if cand < len(lower_original)
+                ]
+                best_ratio, best_span = _best_fuzzy_window(
+                    lowered, lower_original, spans, fuzzy_threshold
+                )
+                if best_ratio >= fuzzy_threshold:
+                    break
 
             if best_ratio >= fuzzy_threshold and best_span is not None:
                 sidx, eidx = best_span
                 try:
-                    extraction.char_interval = CharInterval(start=sidx, end=eidx)
+                    extraction.char_interval = _trusted_interval(sidx, eidx)
                     logger.debug(
                         "Aligned extraction via fuzzy match (index=%d) ratio=%.3f: '%s' -> [%d:%d]",
                         idx,
@@ -169,7 +403,6 @@ def align_extractions(
                     )
                     if sidx >= last_match_end:
                         last_match_end = eidx
-                    aligned.append(extraction)
                     continue
                 except Exception as e:
                     logger.warning(
@@ -184,9 +417,7 @@ def align_extractions(
             end_index = start_index + len(raw_text)
             end_index = min(end_index, len(original_text))
             try:
-                extraction.char_interval = CharInterval(
-                    start=start_index, end=end_index
-                )
+                extraction.char_interval = _trusted_interval(start_index, end_index)
                 if start_index >= last_match_end:
                     last_match_end = end_index
                 logger.debug(
@@ -205,6 +436,4 @@ def align_extractions(
         else:
             logger.warning("Could not align extraction (index=%d): '%s'", idx, raw_text)
 
-        aligned.append(extraction)
-
-    return aligned
+    return list(extractions)
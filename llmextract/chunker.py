@@ -15,8 +15,30 @@ class TextChunk(NamedTuple):
     start_char: int
 
 
+# Boundaries tried, in order, when snapping a chunk end back from chunk_size.
+_SNAP_SEPARATORS = ("\n\n", ". ", "\n", " ")
+
+
+def _snap_end(text: str, start: int, end: int, chunk_size: int) -> int:
+    """
+    Move end back to just after the best separator found in the second half of
+    the chunk, so chunks avoid cutting through sentences and words. Returns
+    end unchanged when no separator is found.
+    """
+    floor = start + chunk_size // 2
+    for sep in _SNAP_SEPARATORS:
+        cut = text.rfind(sep, floor, end)
+        if cut != -1:
+            return cut + len(sep)
+    return end
+
+
 def chunk_text(
-    text: str, chunk_size: int, chunk_overlap: int, keep_trailing: bool = True
+    text: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    keep_trailing: bool = True,
+    snap: bool = False,
 ) -> Iterator[TextChunk]:
     """
     Split long text into possibly overlapping chunks.
@@ -26,6 +48,9 @@ def chunk_text(
       chunk_size: maximum characters per chunk (> chunk_overlap)
       chunk_overlap: overlap in characters between consecutive chunks (>= 0)
       keep_trailing: whether to yield a final short remainder chunk
+      snap: end chunks at a paragraph, sentence or word boundary when one lies
+            in the second half of the chunk (chunks may then be shorter than
+            chunk_size); False keeps strict fixed-length chunks
 
     Yields TextChunk instances.
     """
@@ -40,22 +65,39 @@ def chunk_text(
     if text_len == 0:
         return
 
-    start = 0
-    while start < text_len:
-        end = start + chunk_size
-        if end >= text_len:
-            # final chunk
-            if keep_trailing or start == 0:
-                yield TextChunk(text=text[start:text_len], start_char=start)
-            break
+    if snap:
+        start = 0
+        while start < text_len:
+            end = start + chunk_size
+            if end >= text_len:
+                # final chunk
+                if keep_trailing or start == 0:
+                    yield TextChunk(text=text[start:text_len], start_char=start)
+                break
+
+            end = _snap_end(text, start, end, chunk_size)
+            yield TextChunk(text=text[start:end], start_char=start)
+            # A snapped chunk can be shorter than chunk_overlap; always advance
+            # by half of it so high overlaps cannot degrade to 1-char steps.
+            start = max(end - chunk_overlap, start + max(1, (end - start) // 2))
+    else:
+        # Start offsets come from a C-level range; only the slicing stays in Python.
+        step = chunk_size - chunk_overlap
+        for start in range(0, text_len, step):
+            end = start + chunk_size
+            if end >= text_len:
+                # final chunk
+                if keep_trailing or start == 0:
+                    yield TextChunk(text=text[start:text_len], start_char=start)
+                break
 
-        yield TextChunk(text=text[start:end], start_char=start)
-        start += chunk_size - chunk_overlap
+            yield TextChunk(text=text[start:end], start_char=start)
 
     logger.debug(
-        "Chunking complete. text_len=%d chunk_size=%d chunk_overlap=%d keep_trailing=%s",
+        "Chunking complete. text_len=%d chunk_size=%d chunk_overlap=%d keep_trailing=%s snap=%s",
         text_len,
         chunk_size,
         chunk_overlap,
         keep_trailing,
+        snap,
     )
@@ -0,0 +1,58 @@
+# llmextract/json_utils.py
+import json
+import re
+from typing import Any, Callable, Optional
+
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+
+# orjson silently parses integers outside the 64-bit range as floats; documents
+# containing a digit run this long are handed to the stdlib, which keeps them exact.
+_LONG_DIGIT_RUN = re.compile(r"\d{19,}")
+
+
+def loads(s: str) -> Any:
+    """
+    Parse a JSON document, using orjson when installed and the stdlib otherwise.
+
+    Input orjson rejects but the stdlib accepts (NaN, Infinity) or would parse
+    lossily (integers wider than 64 bits) is parsed by the stdlib, so results do
+    not depend on which backend is installed. Invalid input raises a
+    json.JSONDecodeError (a ValueError).
+    """
+    if orjson is not None and not _LONG_DIGIT_RUN.search(s):
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(s)
+
+
+def dumps(
+    obj: Any, *, indent: bool = False, default: Optional[Callable[[Any], Any]] = None
+) -> str:
+    """
+    Serialize obj to a JSON str without ASCII-escaping non-ASCII characters.
+
+    indent=True produces 2-space indentation; otherwise the output is compact.
+    orjson is used when installed; the stdlib encoder is the fallback, both for
+    objects orjson cannot encode (e.g. integers wider than 64 bits) and when it
+    is missing. For strings, integers, booleans, None, lists and dicts both
+    backends produce the same text. Floats may be spelled differently (1e-07
+    vs 1e-7), NaN and infinities become null with orjson but NaN/Infinity with
+    the stdlib, and orjson encodes some types natively (e.g. datetimes as ISO
+    8601) instead of calling default.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=default, option=option).decode("utf-8")
+        except (orjson.JSONEncodeError, TypeError):
+            pass
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2, default=default)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=default)
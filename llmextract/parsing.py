@@ -2,131 +2,160 @@
 import json
 import logging
 import re
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+from . import json_utils
 from .aligner import align_extractions
 from .chunker import TextChunk
 from .data_models import Extraction
 
 logger = logging.getLogger(__name__)
 
+_CODE_FENCE_RE = re.compile(r"```(?:json)?\s*([\s\S]*?)```", re.IGNORECASE)
+_KEY_VALUE_RE = re.compile(r"^\s*([^:–—\-]+?)\s*[:\-–—]\s*(.+)$")
+_DASHES = ("-", "–", "—")
+_STRUCTURAL_RE = re.compile(r'[{}\[\]"\\]')
+_OPEN_BRACKET_RE = re.compile(r"[{\[]")
+
+# Lowercased key names accepted for each Extraction field in LLM output.
+_CLASS_SYNONYMS = frozenset(
+    {"extraction_class", "class", "type", "label", "category", "name"}
+)
+_TEXT_SYNONYMS = frozenset(
+    {"extraction_text", "text", "value", "span", "extracted_text", "item"}
+)
+_ATTR_SYNONYMS = frozenset({"attributes", "attrs", "properties", "metadata", "meta"})
+_ALL_SYNONYMS = _CLASS_SYNONYMS | _TEXT_SYNONYMS | _ATTR_SYNONYMS
+
 
 def _strip_code_fence(text: str) -> str:
     """
     If the LLM output contains a triple-backtick code fence (``` or ```json),
     return the inner content. Otherwise return the original text.
     """
-    m = re.search(r"```(?:json)?\s*([\s\S]*?)```", text, re.IGNORECASE)
+    if "```" not in text:  # common case: raw JSON, no need to run the regex
+        return text
+    m = _CODE_FENCE_RE.search(text)
     if m:
         return m.group(1).strip()
     return text
 
 
-def _find_json_candidates(text: Optional[str]) -> List[str]:
+def _find_json_candidates(text: Optional[str]) -> Iterator[str]:
     """
-    Scan text and return substrings that look like balanced JSON objects or arrays.
+    Scan text and yield substrings that look like balanced JSON objects or arrays.
     This is a lightweight scanner that avoids counting braces inside JSON strings.
+
+    Only structural characters (brackets, quotes, backslashes) are visited; the
+    regex engine skips over everything in between, including prose before and
+    between candidates. Candidates are produced lazily, so a caller that stops
+    at the first parseable one never scans (or slices) the rest of the text.
     """
-    candidates: List[str] = []
     if not text:
-        return candidates
+        return
 
-    n = len(text)
     i = 0
-    while i < n:
-        ch = text[i]
-        if ch not in "{[":
-            i += 1
-            continue
-
-        opening = ch
+    while True:
+        # Jump straight to the next opening bracket.
+        opener = _OPEN_BRACKET_RE.search(text, i)
+        if opener is None:
+            break
+
+        start = opener.start()
+        opening = text[start]
+        closing = "}" if opening == "{" else "]"
         depth = 0
         in_string = False
-        esc = False
-        start = i
-        j = i
-        while j < n:
+        escaped_at = -1  # index of the character escaped by a preceding backslash
+        for m in _STRUCTURAL_RE.finditer(text, start):
+            j = m.start()
             c = text[j]
-            if c == '"' and not esc:
+            escaped = j == escaped_at
+            if c == '"' and not escaped:
                 in_string = not in_string
-            if c == "\\" and not esc:
-                esc = True
-            else:
-                esc = False
+            elif c == "\\" and not escaped:
+                escaped_at = j + 1
 
             if not in_string:
                 if c == opening:
                     depth += 1
-                elif (opening == "{" and c == "}") or (opening == "[" and c == "]"):
+                elif c == closing:
                     depth -= 1
 
                 if depth == 0:
-                    candidates.append(text[start : j + 1])
+                    yield text[start : j + 1]
                     i = j + 1
                     break
-            j += 1
         else:
             # no matching close found; advance one char from start
             i = start + 1
 
-    return candidates
+
+def _split_key_value(s: str) -> Optional[Tuple[str, str]]:
+    """Split a "key: value" / "key - value" line into stripped (key, value)."""
+    # Fast path for the common "key: value" form; the regex handles dashes,
+    # multi-line strings and edge cases with empty sides.
+    head, sep, tail = s.partition(":")
+    if sep and "\n" not in s and not any(d in head for d in _DASHES):
+        key, value = head.strip(), tail.strip()
+        if key and value:
+            return key, value
+
+    m = _KEY_VALUE_RE.match(s)
+    if m:
+        return m.group(1).strip(), m.group(2).strip()
+    return None
+
+
+def _payload_items(raw: Any) -> List[Any]:
+    """Items of an extractions payload, unwrapping a top-level {"extractions": ...}."""
+    if raw is None:
+        return []
+    if isinstance(raw, dict) and "extractions" in raw:
+        raw = raw["extractions"]
+    if isinstance(raw, (str, dict)):
+        return [raw]
+    if isinstance(raw, list):
+        return raw
+    return [str(raw)]
 
 
 def transform_llm_extractions(raw_extractions: Any) -> List[Dict[str, Any]]:
     """
     Normalize many common LLM output shapes to a list of dicts:
       {"extraction_class", "extraction_text", "attributes"}.
-    """
-    class_synonyms = {
-        "extraction_class",
-        "class",
-        "type",
-        "label",
-        "category",
-        "name",
-    }
-    text_synonyms = {
-        "extraction_text",
-        "text",
-        "value",
-        "span",
-        "extracted_text",
-        "item",
-    }
-    attr_synonyms = {"attributes", "attrs", "properties", "metadata", "meta"}
 
+    Nested lists and JSON-encoded strings are expanded in place using an
+    explicit stack, preserving the order items appear in.
+    """
     corrected: List[Dict[str, Any]] = []
 
-    if raw_extractions is None:
-        return corrected
-
-    if isinstance(raw_extractions, dict) and "extractions" in raw_extractions:
-        raw_extractions = raw_extractions["extractions"]
+    stack = list(reversed(_payload_items(raw_extractions)))
+    while stack:
+        item = stack.pop()
 
-    if isinstance(raw_extractions, (str, dict)):
-        items = [raw_extractions]
-    elif isinstance(raw_extractions, list):
-        items = raw_extractions
-    else:
-        items = [str(raw_extractions)]
-
-    for item in items:
         if isinstance(item, list):
-            corrected.extend(transform_llm_extractions(item))
+            stack.extend(reversed(item))
             continue
 
         if isinstance(item, dict):
             if "extractions" in item and isinstance(item["extractions"], list):
-                corrected.extend(transform_llm_extractions(item["extractions"]))
+                stack.extend(reversed(item["extractions"]))
                 continue
 
-            map_keys = {k.lower(): k for k in item.keys()}
-
-            class_key = next(
-                (map_keys[k] for k in map_keys if k in class_synonyms), None
-            )
-            text_key = next((map_keys[k] for k in map_keys if k in text_synonyms), None)
-            attr_key = next((map_keys[k] for k in map_keys if k in attr_synonyms), None)
+            class_key = text_key = attr_key = None
+            for k in item:
+                # Canonical (already lowercase) keys skip the lower() call.
+                lk = k if k in _ALL_SYNONYMS else str(k).lower()
+                if lk in _CLASS_SYNONYMS:
+                    if class_key is None:
+                        class_key = k
+                elif lk in _TEXT_SYNONYMS:
+                    if text_key is None:
+                        text_key = k
+                elif lk in _ATTR_SYNONYMS:
+                    if attr_key is None:
+                        attr_key = k
 
             if class_key and text_key:
                 ext_class = item.get(class_key)
@@ -169,6 +198,8 @@ def transform_llm_extractions(raw_extractions: Any) -> List[Dict[str, Any]]:
             corrected.append(
                 {
                     "extraction_class": "unknown",
+                    # Human-readable text, not a wire format: keep the stdlib
+                    # layout with spaces after separators.
                     "extraction_text": json.dumps(item, ensure_ascii=False),
                     "attributes": {},
                 }
@@ -178,18 +209,23 @@ def transform_llm_extractions(raw_extractions: Any) -> List[Dict[str, Any]]:
         if isinstance(item, str):
             s = item.strip()
             try:
-                parsed = json.loads(s)
-                corrected.extend(transform_llm_extractions(parsed))
-                continue
+                parsed = json_utils.loads(s)
             except Exception:
                 pass
-
-            m = re.match(r"^\s*([^:–—\-]+?)\s*[:\-–—]\s*(.+)$", s)
-            if m:
+            else:
+                if parsed is None or isinstance(parsed, (list, dict, str)):
+                    stack.extend(reversed(_payload_items(parsed)))
+                    continue
+                # Bare numbers/booleans: use their Python text form directly;
+                # re-parsing it would only yield the same scalar again.
+                s = str(parsed)
+
+            key_value = _split_key_value(s)
+            if key_value is not None:
                 corrected.append(
                     {
-                        "extraction_class": m.group(1).strip(),
-                        "extraction_text": m.group(2).strip(),
+                        "extraction_class": key_value[0],
+                        "extraction_text": key_value[1],
                         "attributes": {},
                     }
                 )
@@ -211,6 +247,15 @@ def transform_llm_extractions(raw_extractions: Any) -> List[Dict[str, Any]]:
     return corrected
 
 
+def _is_stripped_str(value: Any) -> bool:
+    return (
+        isinstance(value, str)
+        and bool(value)
+        and not value[0].isspace()
+        and not value[-1].isspace()
+    )
+
+
 def parse_and_align_chunk(
     llm_output_content: str, chunk: TextChunk
 ) -> List[Extraction]:
@@ -222,19 +267,25 @@ def parse_and_align_chunk(
 
     raw_extractions: Optional[List[Any]] = None
 
-    # Try to parse whole content as JSON
-    try:
-        parsed = json.loads(content)
-        if isinstance(parsed, dict) and "extractions" in parsed:
-            raw_extractions = parsed["extractions"]
-        elif isinstance(parsed, list):
-            raw_extractions = parsed
-    except Exception:
+    # Try to parse whole content as JSON; only worth attempting when it starts
+    # like an object/array, otherwise go straight to the candidate scan.
+    parsed_whole = False
+    if content.lstrip()[:1] in ("{", "["):
+        try:
+            parsed = json_utils.loads(content)
+            parsed_whole = True
+            if isinstance(parsed, dict) and "extractions" in parsed:
+                raw_extractions = parsed["extractions"]
+            elif isinstance(parsed, list):
+                raw_extractions = parsed
+        except Exception:
+            pass
+
+    if not parsed_whole:
         # try scanning for balanced JSON objects/arrays
-        candidates = _find_json_candidates(content)
-        for cand in candidates:
+        for cand in _find_json_candidates(content):
             try:
-                parsed = json.loads(cand)
+                parsed = json_utils.loads(cand)
                 if isinstance(parsed, dict) and "extractions" in parsed:
                     raw_extractions = parsed["extractions"]
                     break
@@ -256,6 +307,24 @@ def parse_and_align_chunk(
 
     validated: List[Extraction] = []
     for idx, item in enumerate(transformed):
+        ext_class = item["extraction_class"]
+        ext_text = item["extraction_text"]
+        attrs = item["attributes"]
+        # Items already in validated form (non-empty stripped strings, dict
+        # attributes) skip pydantic validation; anything else goes through it.
+        if (
+            _is_stripped_str(ext_class)
+            and _is_stripped_str(ext_text)
+            and isinstance(attrs, dict)
+        ):
+            validated.append(
+                Extraction.model_construct(
+                    extraction_class=ext_class,
+                    extraction_text=ext_text,
+                    attributes=attrs,
+                )
+            )
+            continue
         try:
             ext = Extraction(**item)
             validated.append(ext)
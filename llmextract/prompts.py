@@ -1,25 +1,25 @@
 # llmextract/prompts.py
 
-import json
 import logging
 from typing import List, Optional
 
+from . import json_utils
 from .data_models import ExampleData
 
 logger = logging.getLogger(__name__)
 
 
-def format_prompt(
+def build_prompt_prefix(
     prompt_description: str,
     examples: List[ExampleData],
-    text: str,
     max_examples: Optional[int] = None,
 ) -> str:
     """
-    Build the prompt sent to the LLM.
+    Build the part of the prompt that does not depend on the chunk text:
+    instructions, prompt description, serialized examples and task preamble.
 
-    The model is instructed to reply with only a single JSON object:
-    {"extractions": [ ... ]} and no additional prose.
+    It is the same for every chunk of a document, so callers build it once and
+    combine it with each chunk via format_chunk_prompt().
     """
     if max_examples is not None and len(examples) > max_examples:
         logger.debug(
@@ -49,15 +49,32 @@ def format_prompt(
             ext.model_dump(exclude={"char_interval"}, exclude_none=True)
             for ext in example.extractions
         ]
-        example_json = json.dumps(
-            {"extractions": extractions_list}, indent=2, ensure_ascii=False
-        )
+        example_json = json_utils.dumps({"extractions": extractions_list}, indent=True)
         parts.append(f"Text:\n'''\n{example.text}\n'''")
         parts.append(f"JSON Output:\n{example_json}")
 
     parts.append("\n-- TASK --")
     parts.append('If there are no extractions, return {"extractions": []}.')
-    parts.append(f"Text:\n'''\n{text}\n'''")
-    parts.append("JSON Output:")
 
     return "\n\n".join(parts)
+
+
+def format_chunk_prompt(prefix: str, text: str) -> str:
+    """Complete a prefix from build_prompt_prefix() with the text to extract from."""
+    return f"{prefix}\n\nText:\n'''\n{text}\n'''\n\nJSON Output:"
+
+
+def format_prompt(
+    prompt_description: str,
+    examples: List[ExampleData],
+    text: str,
+    max_examples: Optional[int] = None,
+) -> str:
+    """
+    Build the prompt sent to the LLM.
+
+    The model is instructed to reply with only a single JSON object:
+    {"extractions": [ ... ]} and no additional prose.
+    """
+    prefix = build_prompt_prefix(prompt_description, examples, max_examples)
+    return format_chunk_prompt(prefix, text)
@@ -2,15 +2,47 @@
 
 import os
 import logging
-from typing import Any, Dict, Optional
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
 
 from pydantic import SecretStr
 
 logger = logging.getLogger(__name__)
 
+# Recently built chat models, reused by get_llm_provider(reuse=True) so their
+# HTTP connection pools survive across extract() calls.
+_PROVIDER_CACHE_SIZE = 32
+_provider_cache: "OrderedDict[Hashable, Any]" = OrderedDict()
+_provider_cache_lock = threading.Lock()
+
+_ENV_KEYS = ("OPENROUTER_API_KEY", "OPENAI_API_KEY")
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    hash(value)  # raises TypeError for unhashable values
+    return value
+
+
+def _provider_cache_key(
+    model_name: str, provider_kwargs: Optional[Dict[str, Any]]
+) -> Optional[Hashable]:
+    try:
+        frozen = _freeze(provider_kwargs or {})
+    except TypeError:
+        return None
+    # Keys read from the environment change which credentials the model uses.
+    return (model_name, frozen, tuple(os.getenv(k) for k in _ENV_KEYS))
+
 
 def get_llm_provider(
-    model_name: str, provider_kwargs: Optional[Dict[str, Any]] = None
+    model_name: str,
+    provider_kwargs: Optional[Dict[str, Any]] = None,
+    reuse: bool = False,
 ) -> Any:
     """
     Factory returning a LangChain Chat model instance.
@@ -18,7 +50,38 @@ def get_llm_provider(
     provider_kwargs may include:
       - provider: "openrouter" | "ollama" (preferred)
       - api_key, base_url, ollama_base_url, default_headers
+      - http_client, http_async_client: pre-built httpx clients (OpenAI-compatible
+        providers only) so callers can share one connection pool across calls
+
+    reuse: return a previously built instance for the same model_name and
+           provider_kwargs, keeping its HTTP connections alive. Only safe for
+           synchronous use; async clients are bound to the event loop that
+           first used them.
     """
+    if not reuse:
+        return _build_llm_provider(model_name, provider_kwargs)
+
+    key = _provider_cache_key(model_name, provider_kwargs)
+    if key is None:
+        return _build_llm_provider(model_name, provider_kwargs)
+
+    with _provider_cache_lock:
+        llm = _provider_cache.get(key)
+        if llm is not None:
+            _provider_cache.move_to_end(key)
+            return llm
+
+    llm = _build_llm_provider(model_name, provider_kwargs)
+    with _provider_cache_lock:
+        _provider_cache[key] = llm
+        while len(_provider_cache) > _PROVIDER_CACHE_SIZE:
+            _provider_cache.popitem(last=False)
+    return llm
+
+
+def _build_llm_provider(
+    model_name: str, provider_kwargs: Optional[Dict[str, Any]] = None
+) -> Any:
     kwargs = provider_kwargs or {}
     provider_hint = kwargs.get("provider")
     is_openrouter_style = "/" in model_name
@@ -68,6 +131,11 @@ def get_llm_provider(
             )
         base_url = kwargs.get("base_url", "https://openrouter.ai/api/v1")
         headers = kwargs.get("default_headers", {})
+        client_kwargs: Dict[str, Any] = {}
+        if kwargs.get("http_client") is not None:
+            client_kwargs["http_client"] = kwargs["http_client"]
+        if kwargs.get("http_async_client") is not None:
+            client_kwargs["http_async_client"] = kwargs["http_async_client"]
         logger.debug("Initializing ChatOpenAI (OpenRouter/OpenAI-compatible) model.")
         return ChatOpenAI(
             model=model_name,
@@ -75,6 +143,7 @@ def get_llm_provider(
             base_url=base_url,
             default_headers=headers,
             temperature=0.0,
+            **client_kwargs,
         )
 
     if provider == "ollama":
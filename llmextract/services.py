@@ -1,20 +1,141 @@
 # llmextract/services.py
 
 import asyncio
+import atexit
+import hashlib
+import itertools
 import logging
 import random
+import sys
+import threading
 import time
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor, as_completed, Future
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 
+try:
+    import httpx  # type: ignore
+except ImportError:
+    httpx = None
+
 from .chunker import chunk_text, TextChunk
 from .data_models import AnnotatedDocument, ExampleData, Extraction
 from .parsing import parse_and_align_chunk
-from .prompts import format_prompt
+from .prompts import build_prompt_prefix, format_chunk_prompt
 from .providers import get_llm_provider
 
 logger = logging.getLogger(__name__)
 
+# provider_kwargs entries that are live objects rather than settings; they are
+# passed to the provider but never copied into document metadata.
+_NON_METADATA_KEYS = frozenset({"http_client", "http_async_client"})
+
+# provider_kwargs entries that are hashed before entering the response-cache key.
+_SECRET_KEYS = frozenset({"api_key"})
+
+# Sort key for extractions without a char_interval in _dedupe_extractions.
+_NO_START = sys.maxsize
+
+# Process-wide LRU of raw LLM responses, used when extract(cache=True).
+_RESPONSE_CACHE_SIZE = 1024
+_response_cache: "OrderedDict[str, str]" = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+
+def _response_cache_key(
+    model_name: str, provider_kwargs: Optional[Dict[str, Any]], prompt: str
+) -> str:
+    # Every setting (provider, base_url, headers, ...) can change the response;
+    # live client objects cannot, and secrets enter the key only as digests.
+    settings = []
+    for k, v in sorted((provider_kwargs or {}).items()):
+        if k in _NON_METADATA_KEYS:
+            continue
+        if k in _SECRET_KEYS and v is not None:
+            v = hashlib.blake2b(str(v).encode("utf-8"), digest_size=16).hexdigest()
+        settings.append((k, v))
+    payload = f"{model_name}|{settings!r}|{prompt}".encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=20).hexdigest()
+
+
+def _response_cache_get(key: str) -> Optional[str]:
+    with _response_cache_lock:
+        content = _response_cache.get(key)
+        if content is not None:
+            _response_cache.move_to_end(key)
+        return content
+
+
+def _response_cache_put(key: str, content: str) -> None:
+    with _response_cache_lock:
+        _response_cache[key] = content
+        _response_cache.move_to_end(key)
+        while len(_response_cache) > _RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
+
+
+# Worker pools shared by extract() calls, keyed by max_workers, so repeated
+# calls do not pay thread start-up each time. Shut down at interpreter exit.
+_POOLS: Dict[int, ThreadPoolExecutor] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def _get_pool(max_workers: int) -> ThreadPoolExecutor:
+    with _POOLS_LOCK:
+        pool = _POOLS.get(max_workers)
+        if pool is None:
+            pool = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="llmextract"
+            )
+            _POOLS[max_workers] = pool
+        return pool
+
+
+def _shutdown_pools() -> None:
+    with _POOLS_LOCK:
+        for pool in _POOLS.values():
+            pool.shutdown(wait=False)
+        _POOLS.clear()
+
+
+atexit.register(_shutdown_pools)
+
+
+def _make_async_http_client(max_connections: int) -> Any:
+    """
+    Async httpx client whose pool matches aextract()'s concurrency, using HTTP/2
+    when the h2 package is installed. Returns None if httpx is unavailable.
+    """
+    if httpx is None:
+        return None
+    try:
+        import h2  # type: ignore  # noqa: F401
+
+        http2 = True
+    except ImportError:
+        http2 = False
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        ),
+    )
+
+
+_jitter = threading.local()
+
+
+def _retry_delay(retry_backoff: float, attempt: int) -> float:
+    """Exponential backoff plus up to 100ms of jitter for a failed attempt."""
+    # Each worker thread draws jitter from its own generator rather than the
+    # shared module-level random state.
+    rng = getattr(_jitter, "rng", None)
+    if rng is None:
+        rng = _jitter.rng = random.Random()
+    return retry_backoff * (2**attempt) + rng.random() * 0.1
+
 
 def _configure_verbose_logging(verbose: int) -> None:
     pkg_logger = logging.getLogger("llmextract")
@@ -35,27 +156,68 @@ def _configure_verbose_logging(verbose: int) -> None:
         pkg_logger.setLevel(logging.WARNING)
 
 
+@lru_cache(maxsize=4096)
 def _normalize_text_for_dedupe(s: str) -> str:
     return " ".join(s.split()).casefold()
 
 
 def _dedupe_extractions(extractions: List[Extraction]) -> List[Extraction]:
-    seen: Dict[Tuple[str, str], Extraction] = {}
+    # Keep the earliest-positioned extraction per key; unaligned ones sort last.
+    seen: Dict[Tuple[str, str], Tuple[int, Extraction]] = {}
     for ext in extractions:
         key = (ext.extraction_class, _normalize_text_for_dedupe(ext.extraction_text))
-        current = seen.get(key)
-        if current is None:
-            seen[key] = ext
-            continue
+        ci = ext.char_interval
+        start = ci.start if ci is not None else _NO_START
+        prev = seen.get(key)
+        if prev is None or start < prev[0]:
+            seen[key] = (start, ext)
 
-        cur_start = (
-            current.char_interval.start if current.char_interval else float("inf")
-        )
-        new_start = ext.char_interval.start if ext.char_interval else float("inf")
-        if new_start < cur_start:
-            seen[key] = ext
+    return [ext for _, ext in seen.values()]
 
-    return list(seen.values())
+
+def _group_duplicate_chunks(
+    chunks: List[TextChunk],
+) -> Tuple[List[int], Dict[int, List[int]]]:
+    """
+    Return the indices of chunks that need an LLM call (first occurrence of each
+    distinct chunk text) and, per dispatched index, later chunks with the same text.
+    """
+    first_by_text: Dict[str, int] = {}
+    duplicates: Dict[int, List[int]] = {}
+    for idx, chunk in enumerate(chunks):
+        first = first_by_text.setdefault(chunk.text, idx)
+        if first != idx:
+            duplicates.setdefault(first, []).append(idx)
+    return list(first_by_text.values()), duplicates
+
+
+def _shift_extractions(extractions: List[Extraction], offset: int) -> List[Extraction]:
+    """Copy extractions, moving their char_interval by offset characters."""
+    shifted: List[Extraction] = []
+    for ext in extractions:
+        copy = ext.model_copy(deep=True)
+        if copy.char_interval is not None:
+            copy.char_interval.start += offset
+            copy.char_interval.end += offset
+        shifted.append(copy)
+    return shifted
+
+
+def _store_with_duplicates(
+    per_chunk: List[List[Extraction]],
+    extras: List[Extraction],
+    chunk_idx: int,
+    chunks: List[TextChunk],
+    duplicates: Dict[int, List[int]],
+) -> None:
+    """
+    Store a dispatched chunk's extractions in its slot of per_chunk, and shifted
+    copies in the slots of its duplicates, so flattening keeps document order.
+    """
+    per_chunk[chunk_idx] = list(extras)
+    for dup_idx in duplicates.get(chunk_idx, []):
+        offset = chunks[dup_idx].start_char - chunks[chunk_idx].start_char
+        per_chunk[dup_idx] = _shift_extractions(extras, offset)
 
 
 def extract(
@@ -72,12 +234,18 @@ def extract(
     retries: int = 2,
     retry_backoff: float = 1.0,
     dedupe: bool = False,
+    cache: bool = False,
+    snap_chunks: bool = False,
 ) -> AnnotatedDocument:
     """
     Synchronous extraction with per-chunk isolation and optional retries.
 
     error_mode: "return" (default) collects per-chunk errors in metadata["errors"],
                 "raise" will re-raise the first chunk exception.
+    cache: reuse raw LLM responses for identical (model, prompt) pairs seen
+           earlier in this process instead of calling the model again.
+    snap_chunks: end chunks at sentence/word boundaries instead of exactly
+                 chunk_size characters (see chunker.chunk_text).
     """
     _configure_verbose_logging(verbose)
 
@@ -93,14 +261,26 @@ def extract(
             "use a compatible provider."
         )
 
-    llm = get_llm_provider(model_name, provider_kwargs)
-    chunks = list(chunk_text(text, chunk_size, chunk_overlap))
+    # Reuse the model (and its connection pool) across calls with the same
+    # settings; aextract() builds a fresh one per event loop instead.
+    llm = get_llm_provider(model_name, provider_kwargs, reuse=True)
+    chunks = list(chunk_text(text, chunk_size, chunk_overlap, snap=snap_chunks))
+
+    # Instructions and serialized examples are identical for every chunk, so
+    # build them once; a failure is reported per chunk as before.
+    prefix_error: Optional[Exception] = None
+    try:
+        prompt_prefix = build_prompt_prefix(prompt_description, examples)
+    except Exception as e:
+        prompt_prefix, prefix_error = "", e
 
     def _process_chunk(chunk_index: int, chunk: TextChunk) -> Dict[str, Any]:
         last_exc: Optional[Exception] = None
         # Build prompt first (catch errors early)
         try:
-            prompt = format_prompt(prompt_description, examples, chunk.text)
+            if prefix_error is not None:
+                raise prefix_error
+            prompt = format_chunk_prompt(prompt_prefix, chunk.text)
         except Exception as e:
             logger.exception("Failed to build prompt for chunk %d: %s", chunk_index, e)
             return {
@@ -117,6 +297,18 @@ def extract(
             except Exception:
                 logger.debug("LLM prompt (chunk %d): <unserializable>", chunk_index)
 
+        cache_key = (
+            _response_cache_key(model_name, provider_kwargs, prompt) if cache else None
+        )
+        if cache_key is not None:
+            cached = _response_cache_get(cache_key)
+            if cached is not None:
+                logger.debug("Using cached LLM response (chunk %d)", chunk_index)
+                return {
+                    "success": True,
+                    "extractions": parse_and_align_chunk(cached, chunk),
+                }
+
         for attempt in range(max(1, retries)):
             try:
                 response = llm.invoke([HumanMessage(content=prompt)])
@@ -141,18 +333,17 @@ def extract(
                     raise TypeError(
                         f"Expected str content from LLM, got {type(content)}"
                     )
-                return {
-                    "success": True,
-                    "extractions": parse_and_align_chunk(content, chunk),
-                }
+                extractions = parse_and_align_chunk(content, chunk)
+                if cache_key is not None:
+                    _response_cache_put(cache_key, content)
+                return {"success": True, "extractions": extractions}
             except Exception as e:
                 last_exc = e
                 logger.warning(
                     "Chunk %d: attempt %d failed: %s", chunk_index, attempt + 1, e
                 )
                 if attempt + 1 < retries:
-                    sleep_for = retry_backoff * (2**attempt) + random.random() * 0.1
-                    time.sleep(sleep_for)
+                    time.sleep(_retry_delay(retry_backoff, attempt))
                     continue
                 return {
                     "success": False,
@@ -170,17 +361,24 @@ def extract(
             "chunk_index": chunk_index,
         }
 
-    all_extractions: List[Extraction] = []
+    # Results are stored per chunk and flattened afterwards so the output
+    # follows document order regardless of completion order.
+    per_chunk: List[List[Extraction]] = [[] for _ in chunks]
     errors: List[Dict[str, Any]] = []
 
     if not chunks:
         return AnnotatedDocument(text=text, extractions=[], metadata={})
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures_map: Dict[Future, Tuple[int, TextChunk]] = {
-            executor.submit(_process_chunk, idx, chunk): (idx, chunk)
-            for idx, chunk in enumerate(chunks)
-        }
+    # Chunks with identical text (e.g. repeated boilerplate) are sent once and
+    # their results replicated at each duplicate's offset.
+    dispatch, duplicates = _group_duplicate_chunks(chunks)
+
+    executor = _get_pool(max_workers)
+    futures_map: Dict[Future, Tuple[int, TextChunk]] = {
+        executor.submit(_process_chunk, idx, chunks[idx]): (idx, chunks[idx])
+        for idx in dispatch
+    }
+    try:
         for future in as_completed(futures_map):
             mapping = futures_map.get(future)
             chunk_idx = mapping[0] if mapping else None
@@ -204,8 +402,10 @@ def extract(
 
             if result.get("success") is True:
                 extras = result.get("extractions")
-                if isinstance(extras, list):
-                    all_extractions.extend(extras)
+                if isinstance(extras, list) and chunk_idx is not None:
+                    _store_with_duplicates(
+                        per_chunk, extras, chunk_idx, chunks, duplicates
+                    )
                 else:
                     logger.warning(
                         "Chunk %s reported success but 'extractions' is not a list",
@@ -225,7 +425,13 @@ def extract(
                     if isinstance(exc, Exception):
                         raise exc
                     raise RuntimeError(err_msg)
+    finally:
+        # The pool outlives this call; drop work that has not started if we
+        # are leaving early (error_mode="raise").
+        for future in futures_map:
+            future.cancel()
 
+    all_extractions = list(itertools.chain.from_iterable(per_chunk))
     if dedupe:
         all_extractions = _dedupe_extractions(all_extractions)
 
@@ -237,7 +443,9 @@ def extract(
         "num_extractions": len(all_extractions),
     }
     if provider_kwargs:
-        metadata.update(provider_kwargs)
+        metadata.update(
+            {k: v for k, v in provider_kwargs.items() if k not in _NON_METADATA_KEYS}
+        )
     if errors:
         metadata["errors"] = errors
 
@@ -258,6 +466,8 @@ async def aextract(
     retries: int = 2,
     retry_backoff: float = 1.0,
     dedupe: bool = False,
+    cache: bool = False,
+    snap_chunks: bool = False,
 ) -> AnnotatedDocument:
     _configure_verbose_logging(verbose)
 
@@ -272,17 +482,36 @@ async def aextract(
             "langchain_core is required to call aextract(); install langchain or use a compatible provider."
         )
 
-    llm = get_llm_provider(model_name, provider_kwargs)
-    chunks = list(chunk_text(text, chunk_size, chunk_overlap))
+    chunks = list(chunk_text(text, chunk_size, chunk_overlap, snap=snap_chunks))
 
-    sem = asyncio.Semaphore(max_concurrency or max(1, min(10, len(chunks))))
+    # Instructions and serialized examples are identical for every chunk, so
+    # build them once; a failure is reported per chunk as before.
+    prefix_error: Optional[Exception] = None
+    try:
+        prompt_prefix = build_prompt_prefix(prompt_description, examples)
+    except Exception as e:
+        prompt_prefix, prefix_error = "", e
+
+    concurrency = max_concurrency or max(1, min(10, len(chunks)))
+    sem = asyncio.Semaphore(concurrency)
+
+    # Unless the caller supplied one, give OpenAI-compatible providers a
+    # connection pool sized to the semaphore; it is closed before returning.
+    own_client = None
+    llm_kwargs = provider_kwargs
+    if not (provider_kwargs or {}).get("http_async_client"):
+        own_client = _make_async_http_client(concurrency)
+        if own_client is not None:
+            llm_kwargs = {**(provider_kwargs or {}), "http_async_client": own_client}
 
     async def _process_chunk_async(
         chunk_index: int, chunk: TextChunk
     ) -> Dict[str, Any]:
         last_exc: Optional[Exception] = None
         try:
-            prompt = format_prompt(prompt_description, examples, chunk.text)
+            if prefix_error is not None:
+                raise prefix_error
+            prompt = format_chunk_prompt(prompt_prefix, chunk.text)
         except Exception as e:
             logger.exception(
                 "Failed to build prompt for async chunk %d: %s", chunk_index, e
@@ -303,58 +532,76 @@ async def aextract(
                     "LLM prompt (async chunk %d): <unserializable>", chunk_index
                 )
 
-        async with sem:
-            for attempt in range(max(1, retries)):
-                try:
+        cache_key = (
+            _response_cache_key(model_name, provider_kwargs, prompt) if cache else None
+        )
+        if cache_key is not None:
+            cached = _response_cache_get(cache_key)
+            if cached is not None:
+                logger.debug("Using cached LLM response (async chunk %d)", chunk_index)
+                return {
+                    "success": True,
+                    "extractions": await asyncio.to_thread(
+                        parse_and_align_chunk, cached, chunk
+                    ),
+                }
+
+        for attempt in range(max(1, retries)):
+            try:
+                # Hold a slot only for the request itself, not while parsing
+                # the reply or sleeping before a retry.
+                async with sem:
                     response = await llm.ainvoke([HumanMessage(content=prompt)])
-                    content = getattr(response, "content", None)
-
-                    # Log raw LLM output in DEBUG (full verbose) mode
-                    if logger.isEnabledFor(logging.DEBUG):
-                        try:
-                            logger.debug(
-                                "LLM raw response (async chunk %d):\n%s",
-                                chunk_index,
-                                content,
-                            )
-                        except Exception:
-                            logger.debug(
-                                "LLM raw response (async chunk %d): <unserializable>",
-                                chunk_index,
-                            )
-
-                    if not isinstance(content, str):
+                content = getattr(response, "content", None)
+
+                # Log raw LLM output in DEBUG (full verbose) mode
+                if logger.isEnabledFor(logging.DEBUG):
+                    try:
                         logger.debug(
-                            "LLM async response (chunk %d) object repr: %r",
+                            "LLM raw response (async chunk %d):\n%s",
                             chunk_index,
-                            response,
+                            content,
                         )
-                        raise TypeError(
-                            f"Expected str content from LLM, got {type(content)}"
+                    except Exception:
+                        logger.debug(
+                            "LLM raw response (async chunk %d): <unserializable>",
+                            chunk_index,
                         )
-                    return {
-                        "success": True,
-                        "extractions": parse_and_align_chunk(content, chunk),
-                    }
-                except Exception as e:
-                    last_exc = e
-                    logger.warning(
-                        "Async chunk %d: attempt %d failed: %s",
+
+                if not isinstance(content, str):
+                    logger.debug(
+                        "LLM async response (chunk %d) object repr: %r",
                         chunk_index,
-                        attempt + 1,
-                        e,
+                        response,
                     )
-                    if attempt + 1 < retries:
-                        await asyncio.sleep(
-                            retry_backoff * (2**attempt) + random.random() * 0.1
-                        )
-                        continue
-                    return {
-                        "success": False,
-                        "error": str(last_exc),
-                        "exception": last_exc,
-                        "chunk_index": chunk_index,
-                    }
+                    raise TypeError(
+                        f"Expected str content from LLM, got {type(content)}"
+                    )
+                # Parsing and fuzzy alignment are CPU work; run them off the
+                # event loop so other chunks' requests keep progressing.
+                extractions = await asyncio.to_thread(
+                    parse_and_align_chunk, content, chunk
+                )
+                if cache_key is not None:
+                    _response_cache_put(cache_key, content)
+                return {"success": True, "extractions": extractions}
+            except Exception as e:
+                last_exc = e
+                logger.warning(
+                    "Async chunk %d: attempt %d failed: %s",
+                    chunk_index,
+                    attempt + 1,
+                    e,
+                )
+                if attempt + 1 < retries:
+                    await asyncio.sleep(_retry_delay(retry_backoff, attempt))
+                    continue
+                return {
+                    "success": False,
+                    "error": str(last_exc),
+                    "exception": last_exc,
+                    "chunk_index": chunk_index,
+                }
 
         # Fallback return to satisfy static analyzers (shouldn't be reached)
         logger.error(
@@ -367,16 +614,25 @@ async def aextract(
             "chunk_index": chunk_index,
         }
 
-    tasks = [
-        asyncio.create_task(_process_chunk_async(idx, chunk))
-        for idx, chunk in enumerate(chunks)
-    ]
-    results = await asyncio.gather(*tasks)
+    # Chunks with identical text are sent once (see extract()).
+    dispatch, duplicates = _group_duplicate_chunks(chunks)
 
-    all_extractions: List[Extraction] = []
+    try:
+        llm = get_llm_provider(model_name, llm_kwargs)
+        tasks = [
+            asyncio.create_task(_process_chunk_async(idx, chunks[idx]))
+            for idx in dispatch
+        ]
+        results = await asyncio.gather(*tasks)
+    finally:
+        if own_client is not None:
+            await own_client.aclose()
+
+    # Stored per chunk and flattened afterwards, as in extract().
+    per_chunk: List[List[Extraction]] = [[] for _ in chunks]
     errors: List[Dict[str, Any]] = []
 
-    for res in results:
+    for chunk_idx, res in zip(dispatch, results):
         if not isinstance(res, dict):
             logger.warning("Async worker returned unexpected type: %s", type(res))
             if error_mode == "raise":
@@ -387,7 +643,7 @@ async def aextract(
         if res.get("success") is True:
             extras = res.get("extractions")
             if isinstance(extras, list):
-                all_extractions.extend(extras)
+                _store_with_duplicates(per_chunk, extras, chunk_idx, chunks, duplicates)
             else:
                 logger.warning(
                     "Async chunk reported success but 'extractions' is not a list"
@@ -410,6 +666,7 @@ async def aextract(
                     raise exc
                 raise RuntimeError(err_msg)
 
+    all_extractions = list(itertools.chain.from_iterable(per_chunk))
     if dedupe:
         all_extractions = _dedupe_extractions(all_extractions)
 
@@ -421,7 +678,9 @@ async def aextract(
         "num_extractions": len(all_extractions),
     }
     if provider_kwargs:
-        metadata.update(provider_kwargs)
+        metadata.update(
+            {k: v for k, v in provider_kwargs.items() if k not in _NON_METADATA_KEYS}
+        )
     if errors:
         metadata["errors"] = errors
 
@@ -1,8 +1,10 @@
 import json
 import logging
+import re
 import textwrap
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Union
 
+from . import json_utils
 from .data_models import AnnotatedDocument, Extraction
 
 logger = logging.getLogger(__name__)
@@ -97,6 +99,10 @@ __DATA_PLACEHOLDER__
             } catch (err) {
                 console.error("Failed to parse visualization JSON:", err);
                 return {};
+            } finally {
+                // The parsed object is all the page needs; dropping the
+                // element lets the browser free the raw JSON text.
+                el.remove();
             }
         }
 
@@ -112,44 +118,81 @@ __DATA_PLACEHOLDER__
 
         const docIds = Object.keys(organizedData).sort();
 
+        // Documents carry palette indices per class; expand them to colors
+        // once per document.
+        const PALETTE = __PALETTE_PLACEHOLDER__;
+        const colorMaps = new WeakMap();
+
+        function colorMapFor(docData) {
+            let colorMap = colorMaps.get(docData);
+            if (colorMap === undefined) {
+                colorMap = {};
+                const indices = docData.colorIdx || {};
+                for (const cls of Object.keys(indices)) {
+                    colorMap[cls] = PALETTE[indices[cls] % PALETTE.length];
+                }
+                colorMaps.set(docData, colorMap);
+            }
+            return colorMap;
+        }
+
+        // Option and legend lists are assembled off-DOM in a fragment and
+        // inserted with one replaceChildren() call.
         function populateDocSelector() {
-            docSelector.innerHTML = '';
+            const frag = document.createDocumentFragment();
             docIds.forEach(docId => {
                 const opt = document.createElement('option');
                 opt.value = docId;
                 opt.textContent = docId;
-                docSelector.appendChild(opt);
+                frag.appendChild(opt);
             });
+            docSelector.replaceChildren(frag);
         }
 
         function populateModelSelector(selectedDocId) {
-            modelSelector.innerHTML = '';
             const modelsObj = organizedData[selectedDocId] || {};
             const models = Object.keys(modelsObj).sort();
+            const frag = document.createDocumentFragment();
             models.forEach(modelId => {
                 const opt = document.createElement('option');
                 opt.value = modelId;
                 opt.textContent = modelId;
-                modelSelector.appendChild(opt);
+                frag.appendChild(opt);
             });
+            modelSelector.replaceChildren(frag);
         }
 
+        // Class names and metadata keys repeat across renders; remember their
+        // escaped form. Long strings (segment texts) are escaped uncached, and
+        // the cache is reset once full so it stays small.
+        const escCache = new Map();
+        const ESC_CACHE_MAX_KEY_LEN = 64;
+        const ESC_CACHE_MAX_ENTRIES = 1024;
+        const ESC_LUT = {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#039;'};
+        const ESC_RE = /[&<>"']/g;
+
         function escapeHtml(unsafe) {
             if (typeof unsafe !== 'string') unsafe = String(unsafe);
-            return unsafe.replace(/&/g, "&amp;").replace(/</g, "&lt;")
-                         .replace(/>/g, "&gt;").replace(/"/g, "&quot;")
-                         .replace(/'/g, "&#039;");
+            if (unsafe.length > ESC_CACHE_MAX_KEY_LEN) {
+                return unsafe.replace(ESC_RE, ch => ESC_LUT[ch]);
+            }
+            const cached = escCache.get(unsafe);
+            if (cached !== undefined) return cached;
+            const escaped = unsafe.replace(ESC_RE, ch => ESC_LUT[ch]);
+            if (escCache.size >= ESC_CACHE_MAX_ENTRIES) escCache.clear();
+            escCache.set(unsafe, escaped);
+            return escaped;
         }
 
         function buildLegend(colorMap) {
-            legendContainer.innerHTML = '';
-            if (!colorMap) return;
-            Object.entries(colorMap).forEach(([cls, color]) => {
+            const frag = document.createDocumentFragment();
+            Object.entries(colorMap || {}).forEach(([cls, color]) => {
                 const item = document.createElement('div');
                 item.className = 'legend-item';
                 item.innerHTML = `<div class="legend-color" style="background-color:${color};"></div>${escapeHtml(cls)}`;
-                legendContainer.appendChild(item);
+                frag.appendChild(item);
             });
+            legendContainer.replaceChildren(frag);
         }
 
         function buildHighlightedHtml(text, extractions, colorMap) {
@@ -159,7 +202,8 @@ __DATA_PLACEHOLDER__
             }
 
             const cleansed = [];
-            const bounds = new Set([0, text.length]);
+            const tlen = text.length;
+            const bounds = new Set([0, tlen]);
 
             for (const ext of extractions) {
                 if (!ext || !ext.char_interval) continue;
@@ -169,83 +213,113 @@ __DATA_PLACEHOLDER__
                     console.warn("Skipping extraction with non-numeric interval:", ext);
                     continue;
                 }
-                const start = Math.max(0, Math.min(text.length, Math.floor(s)));
-                const end = Math.max(0, Math.min(text.length, Math.floor(e)));
+                // Clamp to [0, tlen] and floor; once in range, |0 truncation is
+                // floor since the value is non-negative and below 2^31.
+                const start = s > 0 ? (s < tlen ? s | 0 : tlen) : 0;
+                const end = e > 0 ? (e < tlen ? e | 0 : tlen) : 0;
                 if (start >= end) {
                     console.warn("Skipping extraction with invalid interval:", ext);
                     continue;
                 }
                 bounds.add(start);
                 bounds.add(end);
-                cleansed.push(Object.assign({}, ext, {char_interval: {start, end}}));
+                // _seq records input order so overlapping highlights keep it.
+                cleansed.push(Object.assign({}, ext, {char_interval: {start, end}, _seq: cleansed.length}));
             }
 
             const sortedBounds = Array.from(bounds).sort((a,b) => a - b);
-            let html = '';
+            // Fragments are collected and joined once instead of growing a string.
+            const out = [];
+
+            // Sweep over the bounds, keeping the set of extractions that cover
+            // the current segment instead of re-scanning all of them per segment.
+            const byStart = cleansed.slice().sort((a, b) => a.char_interval.start - b.char_interval.start);
+            const byEnd = cleansed.slice().sort((a, b) => a.char_interval.end - b.char_interval.end);
+            const active = new Map();
+            const stops = [];  // gradient color stops, reused across segments
+            const overlapCache = new Map();  // covering _seq list -> {gradient, tooltip}
+            let si = 0;
+            let ei = 0;
 
             for (let i = 0; i < sortedBounds.length - 1; i++) {
                 const segStart = sortedBounds[i];
                 const segEnd = sortedBounds[i + 1];
                 const segmentText = text.slice(segStart, segEnd);
 
-                const covering = cleansed.filter(ext => (
-                    ext.char_interval.start <= segStart && ext.char_interval.end >= segEnd
-                ));
+                while (si < byStart.length && byStart[si].char_interval.start <= segStart) {
+                    active.set(byStart[si]._seq, byStart[si]);
+                    si++;
+                }
+                while (ei < byEnd.length && byEnd[ei].char_interval.end <= segStart) {
+                    active.delete(byEnd[ei]._seq);
+                    ei++;
+                }
+
+                const covering = Array.from(active.values());
+                if (covering.length > 1) covering.sort((a, b) => a._seq - b._seq);
 
                 if (covering.length === 0) {
-                    html += escapeHtml(segmentText);
+                    out.push(escapeHtml(segmentText));
                     continue;
                 }
 
-                function buildTooltipFor(ext) {
-                    let t = `<strong>${escapeHtml(ext.extraction_class)}</strong>`;
-                    const attrs = ext.attributes || {};
-                    const attrKeys = Object.keys(attrs || {});
-                    if (attrKeys.length > 0) {
-                        t += '<hr style="margin:4px 0; border-color:#555;">';
-                        for (const k of attrKeys) {
-                            const val = attrs[k];
-                            const valStr = (typeof val === 'object') ? JSON.stringify(val) : String(val);
-                            t += `<div><em>${escapeHtml(k)}</em>: ${escapeHtml(valStr)}</div>`;
-                        }
-                    }
-                    return t;
-                }
-
+                // Tooltip markup is pre-rendered (and escaped) in Python.
                 if (covering.length === 1) {
                     const ext = covering[0];
                     const color = (colorMap && colorMap[ext.extraction_class]) || '#ccc';
-                    const tooltip = buildTooltipFor(ext);
-                    html += `<span class="highlight" style="background-color:${color};">` +
-                            `${escapeHtml(segmentText)}` +
-                            `<span class="tooltip">${tooltip}</span></span>`;
+                    out.push(
+                        '<span class="highlight" style="background-color:', color, ';">',
+                        escapeHtml(segmentText),
+                        '<span class="tooltip">', ext.tooltip_html, '</span></span>'
+                    );
                 } else {
-                    const uniqueClasses = Array.from(new Set(covering.map(e => e.extraction_class)));
-                    const colors = uniqueClasses.map(c => (colorMap && colorMap[c]) || '#ccc');
-                    const cappedColors = colors.slice(0, 6);
-                    const stop = 100 / cappedColors.length;
-                    const parts = [];
-                    for (let j = 0; j < cappedColors.length; j++) {
-                        const startPct = (j * stop).toFixed(2);
-                        const endPct = ((j + 1) * stop).toFixed(2);
-                        parts.push(`${cappedColors[j]} ${startPct}%, ${cappedColors[j]} ${endPct}%`);
+                    // The same overlap (e.g. around a nested highlight) recurs
+                    // across segments; build its gradient and tooltip once.
+                    const key = covering.map(e => e._seq).join(',');
+                    let overlap = overlapCache.get(key);
+                    if (overlap === undefined) {
+                        // One color per distinct class, in order, at most six.
+                        const seen = Object.create(null);
+                        const cappedColors = [];
+                        for (let k = 0; k < covering.length && cappedColors.length < 6; k++) {
+                            const cls = covering[k].extraction_class;
+                            if (seen[cls]) continue;
+                            seen[cls] = 1;
+                            cappedColors.push((colorMap && colorMap[cls]) || '#ccc');
+                        }
+                        const stop = 100 / cappedColors.length;
+                        stops.length = 0;
+                        for (let j = 0; j < cappedColors.length; j++) {
+                            const startPct = (j * stop).toFixed(2);
+                            const endPct = ((j + 1) * stop).toFixed(2);
+                            stops.push(`${cappedColors[j]} ${startPct}%, ${cappedColors[j]} ${endPct}%`);
+                        }
+                        const tips = [];
+                        for (const ext of covering) {
+                            tips.push(ext.tooltip_html, '<div style="height:6px;"></div>');
+                        }
+                        overlap = {
+                            gradient: `linear-gradient(90deg, ${stops.join(', ')})`,
+                            tooltip: tips.join(''),
+                        };
+                        overlapCache.set(key, overlap);
                     }
-                    const gradient = `linear-gradient(90deg, ${parts.join(', ')})`;
 
-                    let combinedTooltip = '';
-                    for (const ext of covering) {
-                        combinedTooltip += buildTooltipFor(ext);
-                        combinedTooltip += '<div style="height:6px;"></div>';
-                    }
-                    html += `<span class="highlight" style="background:${gradient};">` +
-                            `${escapeHtml(segmentText)}` +
-                            `<span class="tooltip">${combinedTooltip}</span></span>`;
+                    out.push(
+                        '<span class="highlight" style="background:', overlap.gradient, ';">',
+                        escapeHtml(segmentText),
+                        '<span class="tooltip">', overlap.tooltip, '</span></span>'
+                    );
                 }
             }
 
-            return html;
+            return out.join('');
         }
 
+        // Most recently rendered (doc, model) views, oldest first.
+        const RENDER_CACHE_SIZE = 16;
+        const renderCache = new Map();
+
         function render() {
             const selectedDocId = docSelector.value;
             const selectedModelId = modelSelector.value;
@@ -260,22 +334,44 @@ __DATA_PLACEHOLDER__
             contentArea.style.display = 'block';
             noResultArea.style.display = 'none';
 
-            let metadataHtml = '';
+            // The data is fixed for the page's lifetime, so switching back to a
+            // recent document/model reuses its markup.
+            const cacheKey = selectedDocId + '\\0' + selectedModelId;
+            const cached = renderCache.get(cacheKey);
+            if (cached !== undefined) {
+                renderCache.delete(cacheKey);
+                renderCache.set(cacheKey, cached);
+                metadataContainer.innerHTML = cached.meta;
+                legendContainer.innerHTML = cached.legend;
+                textContainer.innerHTML = cached.html;
+                return;
+            }
+
+            const metaParts = [];
             if (docData.metadata) {
                 for (const [k,v] of Object.entries(docData.metadata)) {
                     const display = (typeof v === 'object') ? JSON.stringify(v) : String(v);
-                    metadataHtml += `<strong>${escapeHtml(k)}:</strong> <code>${escapeHtml(display)}</code><br>`;
+                    metaParts.push('<strong>', escapeHtml(k), ':</strong> <code>', escapeHtml(display), '</code><br>');
                 }
             }
+            const metadataHtml = metaParts.join('');
             metadataContainer.innerHTML = metadataHtml;
 
-            buildLegend(docData.colorMap || {});
+            const colorMap = colorMapFor(docData);
+            buildLegend(colorMap);
 
+            let html;
             try {
-                textContainer.innerHTML = buildHighlightedHtml(docData.text || '', docData.extractions || [], docData.colorMap || {});
+                html = buildHighlightedHtml(docData.text || '', docData.extractions || [], colorMap);
             } catch (err) {
                 console.error("Rendering error:", err);
-                textContainer.innerHTML = escapeHtml(docData.text || '');
+                html = escapeHtml(docData.text || '');
+            }
+            textContainer.innerHTML = html;
+
+            renderCache.set(cacheKey, {meta: metadataHtml, legend: legendContainer.innerHTML, html});
+            if (renderCache.size > RENDER_CACHE_SIZE) {
+                renderCache.delete(renderCache.keys().next().value);
             }
         }
 
@@ -317,28 +413,85 @@ __DATA_PLACEHOLDER__
 )
 
 
-def _assign_colors(extractions: List[Extraction]) -> Dict[str, str]:
-    unique = sorted({(ext.extraction_class or "unknown") for ext in extractions})
-    return {cls: _PALETTE[i % len(_PALETTE)] for i, cls in enumerate(unique)}
+# The template split around the data placeholder, so each visualize() call is
+# a single join instead of a search-and-replace over the whole page. The
+# palette is static and written into the page script once.
+_HTML_PREFIX, _HTML_SUFFIX = _HTML_TEMPLATE.replace(
+    "__PALETTE_PLACEHOLDER__", json.dumps(_PALETTE)
+).split("__DATA_PLACEHOLDER__", 1)
+
+# Sequences that would end or confuse the <script> block holding the data.
+# HTML matches end tags case-insensitively, so </SCRIPT> closes the block too.
+_UNSAFE_IN_SCRIPT_RE = re.compile(r"</script|<!--", re.IGNORECASE)
+
+
+def _neutralize_in_script(m: "re.Match[str]") -> str:
+    # Both replacements are valid JSON string escapes, so JSON.parse restores
+    # the original text, including the tag name's case.
+    matched = m.group(0)
+    if matched[1] == "/":
+        return "<\\/" + matched[2:]
+    return "\\u003c!--"
+
+
+# Same replacements as the page's escapeHtml(), so markup built here matches
+# what the viewer would have produced.
+_HTML_ESCAPES = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#039;"}
+)
+
+
+def _escape_html(value: str) -> str:
+    return value.translate(_HTML_ESCAPES)
+
+
+def _attribute_display(value: Any) -> str:
+    """Render an attribute value the way the viewer's JavaScript stringifies it."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if value is None or isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _tooltip_html(ext: Extraction) -> str:
+    """Tooltip markup for one highlight: class name plus its attributes."""
+    parts = [f"<strong>{_escape_html(ext.extraction_class)}</strong>"]
+    attrs = ext.attributes or {}
+    if attrs:
+        parts.append('<hr style="margin:4px 0; border-color:#555;">')
+        for key, value in attrs.items():
+            parts.append(
+                f"<div><em>{_escape_html(str(key))}</em>: "
+                f"{_escape_html(_attribute_display(value))}</div>"
+            )
+    return "".join(parts)
 
 
-def _serialize_extraction(ext: Extraction) -> Dict[str, Any]:
+def _serialize_extraction(ext: Extraction, text_len: int) -> Optional[Dict[str, Any]]:
+    """
+    Viewer payload for an extraction with a char_interval, with the end clamped
+    to the text. Returns None when the interval does not fit the text.
+    """
+    ci = ext.char_interval
+    if ci is None:
+        return None
+    start, end = ci.start, ci.end
+    if start < 0 or start >= end or start > text_len:
+        return None
     data: Dict[str, Any] = {
         "extraction_class": ext.extraction_class,
         "extraction_text": ext.extraction_text,
         "attributes": ext.attributes or {},
+        "char_interval": {"start": start, "end": min(end, text_len)},
     }
-    if ext.char_interval:
-        try:
-            start = int(ext.char_interval.start)
-            end = int(ext.char_interval.end)
-            data["char_interval"] = {"start": start, "end": end}
-        except Exception as e:
-            logger.warning(
-                "Failed to serialize char_interval for extraction %r: %s", ext, e
-            )
-    if getattr(ext, "id", None) is not None:
+    if ext.id is not None:
         data["id"] = ext.id
+    data["tooltip_html"] = _tooltip_html(ext)
     return data
 
 
@@ -350,60 +503,48 @@ def visualize(docs_or_doc: Union[AnnotatedDocument, List[AnnotatedDocument]]) ->
     organized: Dict[str, Dict[str, Any]] = {}
 
     for i, doc in enumerate(docs):
-        doc_id = doc.metadata.get("doc_id") if isinstance(doc.metadata, dict) else None
-        doc_id = doc_id or f"Document_{i + 1}"
-        model_name = (
-            doc.metadata.get("model_name") if isinstance(doc.metadata, dict) else None
-        )
-        model_name = (
-            model_name or doc.metadata.get("model")
-            if isinstance(doc.metadata, dict)
-            else None
-        )
-        model_name = model_name or "Unknown_Model"
-
-        organized.setdefault(doc_id, {})
-
-        valid_extractions = [
-            ext for ext in doc.extractions if ext.char_interval is not None
-        ]
-        color_map = _assign_colors(valid_extractions)
-
+        md: Dict[str, Any] = doc.metadata if isinstance(doc.metadata, dict) else {}
+        doc_id = md.get("doc_id") or f"Document_{i + 1}"
+        model_name = md.get("model_name") or md.get("model") or "Unknown_Model"
+
+        # One pass over the extractions assigns palette indices to classes in
+        # first-seen order (the page uses _PALETTE[index % len]) and collects
+        # the serialized payloads; extractions without an interval are not shown.
+        text_len = len(doc.text)
+        color_indices: Dict[str, int] = {}
         serial_extractions = []
-        for ext in valid_extractions:
-            ser = _serialize_extraction(ext)
-            if "char_interval" in ser:
-                s = ser["char_interval"]["start"]
-                e = ser["char_interval"]["end"]
-                if s < 0 or e < 0 or s >= e or s > len(doc.text) or e < 0:
-                    logger.warning(
-                        "Skipping extraction with out-of-bounds interval (doc=%s, model=%s): %s",
-                        doc_id,
-                        model_name,
-                        ser,
-                    )
-                    continue
-                ser["char_interval"]["start"] = max(0, min(len(doc.text), s))
-                ser["char_interval"]["end"] = max(0, min(len(doc.text), e))
+        for ext in doc.extractions:
+            if ext.char_interval is None:
+                continue
+            cls = ext.extraction_class or "unknown"
+            if cls not in color_indices:
+                color_indices[cls] = len(color_indices)
+            ser = _serialize_extraction(ext, text_len)
+            if ser is None:
+                logger.warning(
+                    "Skipping extraction with out-of-bounds interval (doc=%s, model=%s): %r",
+                    doc_id,
+                    model_name,
+                    ext,
+                )
+                continue
             serial_extractions.append(ser)
 
-        organized[doc_id][model_name] = {
+        organized.setdefault(doc_id, {})[model_name] = {
             "text": doc.text,
             "extractions": serial_extractions,
-            "colorMap": color_map,
-            "metadata": doc.metadata or {},
+            "colorIdx": color_indices,
+            "metadata": md,
         }
 
     try:
-        organized_json = json.dumps(
-            organized, ensure_ascii=False, default=str, indent=2
-        )
+        # Compact: the page only JSON.parse()s this; "Download JSON" re-indents.
+        organized_json = json_utils.dumps(organized, default=str)
     except Exception as e:
         logger.exception("Failed to serialize organized data for visualization: %s", e)
         organized_json = "{}"
 
     # Prevent accidental script-close or HTML comment injection
-    organized_json = organized_json.replace("</script", "<\\/script")
-    organized_json = organized_json.replace("<!--", "<\\!--")
+    organized_json = _UNSAFE_IN_SCRIPT_RE.sub(_neutralize_in_script, organized_json)
 
-    return _HTML_TEMPLATE.replace("__DATA_PLACEHOLDER__", organized_json)
+    return "".join((_HTML_PREFIX, organized_json, _HTML_SUFFIX))
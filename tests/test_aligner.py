@@ -1,5 +1,7 @@
 # tests/test_aligner.py
 
+from unittest.mock import patch
+
 from llmextract.aligner import align_extractions
 from llmextract.data_models import Extraction
 
@@ -66,3 +68,103 @@ def test_align_extraction_not_found():
 
     assert len(aligned) == 1
     assert aligned[0].char_interval is None
+
+
+def test_align_fuzzy_fallback():
+    """Tests that near-miss extractions are aligned by the fuzzy fallback."""
+    text = "The patient takes Lisinopril daily."
+    extractions = [
+        Extraction(extraction_class="dosage", extraction_text="takes Lisinoprill daily")
+    ]
+
+    aligned = align_extractions(extractions, text)
+
+    assert aligned[0].char_interval is not None
+    assert aligned[0].char_interval.start == 12
+
+
+def test_align_repeated_extractions_use_successive_occurrences():
+    """Tests that repeated extraction texts map to successive occurrences."""
+    text = "John Doe was prescribed Lisinopril. John Doe returns next week."
+    extractions = [
+        Extraction(extraction_class="patient", extraction_text="John Doe"),
+        Extraction(extraction_class="patient", extraction_text="John Doe"),
+    ]
+
+    aligned = align_extractions(extractions, text)
+
+    assert aligned[0].char_interval is not None
+    assert aligned[0].char_interval.start == 0
+    assert aligned[1].char_interval is not None
+    assert aligned[1].char_interval.start == 36
+
+
+def test_align_fuzzy_fallback_tolerates_several_typos():
+    """Tests that the n-gram prefilter does not reject a typo-laden near miss."""
+    text = "We met at the cafe near the station."
+    extractions = [
+        Extraction(extraction_class="place", extraction_text="cafe neer the statoin")
+    ]
+
+    aligned = align_extractions(extractions, text)
+
+    assert aligned[0].char_interval is not None
+    assert aligned[0].char_interval.start == 14
+
+
+def test_align_fuzzy_fallback_handles_deleted_character():
+    """Tests that a one-character deletion before the shared block still aligns."""
+    text = "Patient John Doe arrived at the clinic."
+    extractions = [Extraction(extraction_class="patient", extraction_text="Jon Doe")]
+
+    aligned = align_extractions(extractions, text)
+
+    assert aligned[0].char_interval is not None
+    assert (aligned[0].char_interval.start, aligned[0].char_interval.end) == (8, 16)
+
+
+def test_align_fuzzy_threshold_above_one_reports_no_match():
+    """Tests that an unreachable fuzzy threshold fails cleanly instead of raising."""
+    text = "Patient John Doe arrived."
+    extractions = [Extraction(extraction_class="patient", extraction_text="Jon")]
+
+    aligned = align_extractions(extractions, text, fuzzy_threshold=1.5)
+
+    assert aligned[0].char_interval is None
+
+
+def test_align_fuzzy_fallback_scores_every_occurrence_of_shared_block():
+    """Tests that the best window is found when the shared block repeats."""
+    text = "takes lisinopril apple lisinopril"
+    extractions = [Extraction(extraction_class="drug", extraction_text="lisinoprix")]
+
+    aligned = align_extractions(extractions, text)
+
+    assert aligned[0].char_interval is not None
+    assert (aligned[0].char_interval.start, aligned[0].char_interval.end) == (23, 33)
+
+
+def test_align_skips_fuzzy_fallback_for_extraction_longer_than_text():
+    """Tests that an extraction longer than the text never reaches window scoring."""
+    text = "Aspirin."
+    extractions = [
+        Extraction(extraction_class="drug", extraction_text="Aspirin twice daily")
+    ]
+
+    with patch("llmextract.aligner._best_fuzzy_window") as best_window:
+        aligned = align_extractions(extractions, text)
+
+    best_window.assert_not_called()
+    assert aligned[0].char_interval is None
+
+
+def test_align_prefilter_rejects_unrelated_extraction_at_default_threshold():
+    """Tests that an extraction sharing almost no bigrams with the text is rejected early."""
+    text = "The patient takes Lisinopril daily."
+    extractions = [Extraction(extraction_class="drug", extraction_text="xyzzy quux")]
+
+    with patch("llmextract.aligner._best_fuzzy_window") as best_window:
+        aligned = align_extractions(extractions, text)
+
+    best_window.assert_not_called()
+    assert aligned[0].char_interval is None
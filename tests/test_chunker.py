@@ -47,3 +47,23 @@ def test_invalid_chunk_config_raises_error():
         ValueError, match="chunk_size must be greater than chunk_overlap"
     ):
         list(chunk_text("some text", chunk_size=10, chunk_overlap=10))
+
+
+def test_snap_chunking_ends_at_sentence_boundary():
+    """Tests that snap=True ends chunks after a sentence instead of mid-word."""
+    text = "One two three. Four five six seven."
+    chunks = list(chunk_text(text, chunk_size=20, chunk_overlap=0, snap=True))
+
+    assert chunks[0] == TextChunk(text="One two three. ", start_char=0)
+    assert chunks[1] == TextChunk(text="Four five six seven.", start_char=15)
+    assert "".join(c.text for c in chunks) == text
+
+
+def test_snap_chunking_with_high_overlap_keeps_progressing():
+    """Tests that snapping to early boundaries cannot shrink the step to 1 char."""
+    text = ("x" * 58 + ". ") * 37
+    plain = list(chunk_text(text, chunk_size=100, chunk_overlap=80))
+    snapped = list(chunk_text(text, chunk_size=100, chunk_overlap=80, snap=True))
+
+    assert len(snapped) <= len(plain)
+    assert snapped[-1].start_char + len(snapped[-1].text) == len(text)
@@ -0,0 +1,36 @@
+# tests/test_json_utils.py
+
+from unittest.mock import patch
+
+from llmextract import json_utils
+
+_SAMPLE = {
+    "text": 'café <b> "quoted" \n',
+    "ints": [0, -1, 2**63, -(2**63)],
+    "flags": [True, False, None],
+    "nested": {"empty_list": [], "empty_dict": {}, "list": [{"k": "v"}]},
+    7: "int key",
+}
+
+
+def test_dumps_backends_agree_on_json_native_values():
+    """Tests that the orjson and stdlib paths produce the same text for both layouts."""
+    for indent in (False, True):
+        with_orjson = json_utils.dumps(_SAMPLE, indent=indent)
+        with patch.object(json_utils, "orjson", None):
+            with_stdlib = json_utils.dumps(_SAMPLE, indent=indent)
+
+        assert with_orjson == with_stdlib
+
+
+def test_loads_backends_agree_on_nan_and_wide_integers():
+    """Tests that values orjson rejects or rounds parse as the stdlib parses them."""
+    doc = '{"n": NaN, "big": 123456789012345678901234567890, "x": [1.5, "é"]}'
+
+    with_orjson = json_utils.loads(doc)
+    with patch.object(json_utils, "orjson", None):
+        with_stdlib = json_utils.loads(doc)
+
+    assert with_orjson["big"] == with_stdlib["big"] == 123456789012345678901234567890
+    assert with_orjson["x"] == with_stdlib["x"]
+    assert with_orjson["n"] != with_orjson["n"]
@@ -0,0 +1,93 @@
+# tests/test_parsing.py
+
+from llmextract.chunker import TextChunk
+from llmextract.parsing import parse_and_align_chunk, transform_llm_extractions
+
+
+def test_parse_plain_json_output():
+    """Tests that a bare JSON object is parsed and aligned to the chunk."""
+    chunk = TextChunk(text="I ate an apple.", start_char=100)
+    output = (
+        '{"extractions": [{"extraction_class": "fruit", "extraction_text": "apple"}]}'
+    )
+
+    extractions = parse_and_align_chunk(output, chunk)
+
+    assert len(extractions) == 1
+    assert extractions[0].char_interval is not None
+    assert extractions[0].char_interval.start == 109
+    assert extractions[0].char_interval.end == 114
+
+
+def test_parse_json_surrounded_by_prose():
+    """Tests that JSON embedded in conversational text is still found."""
+    chunk = TextChunk(text="I ate an apple.", start_char=0)
+    output = (
+        "Sure! Here you go: "
+        '{"extractions": [{"extraction_class": "fruit", "extraction_text": "apple"}]}'
+        " Let me know if you need more."
+    )
+
+    extractions = parse_and_align_chunk(output, chunk)
+
+    assert [e.extraction_text for e in extractions] == ["apple"]
+
+
+def test_parse_fenced_list_of_single_key_objects():
+    """Tests code-fenced output using the {"class": "text"} shorthand."""
+    chunk = TextChunk(text="I ate an apple.", start_char=0)
+    output = '```json\n[{"fruit": "apple"}]\n```'
+
+    extractions = parse_and_align_chunk(output, chunk)
+
+    assert [(e.extraction_class, e.extraction_text) for e in extractions] == [
+        ("fruit", "apple")
+    ]
+
+
+def test_parse_without_json_returns_empty():
+    """Tests that output without any JSON yields no extractions."""
+    chunk = TextChunk(text="I ate an apple.", start_char=0)
+
+    assert parse_and_align_chunk("I could not find anything.", chunk) == []
+
+
+def test_transform_flattens_nested_and_encoded_items_in_order():
+    """Tests that nested lists and JSON-encoded strings expand in place, in order."""
+    raw = [
+        [{"Class": "a", "TEXT": "one"}],
+        '{"extractions": [{"label": "b", "span": "two"}]}',
+        "c: three",
+        "5",
+    ]
+
+    result = transform_llm_extractions(raw)
+
+    assert [(r["extraction_class"], r["extraction_text"]) for r in result] == [
+        ("a", "one"),
+        ("b", "two"),
+        ("c", "three"),
+        ("unknown", "5"),
+    ]
+
+
+def test_parse_keeps_wide_integers_and_nan_attributes():
+    """Tests that values only the stdlib parser handles exactly are preserved."""
+    chunk = TextChunk(text="I ate an apple.", start_char=0)
+    output = (
+        '{"extractions": [{"extraction_class": "fruit", "extraction_text": "apple", '
+        '"attributes": {"id": 123456789012345678901234567890, "score": NaN}}]}'
+    )
+
+    extractions = parse_and_align_chunk(output, chunk)
+
+    assert extractions[0].attributes["id"] == 123456789012345678901234567890
+    assert extractions[0].attributes["score"] != extractions[0].attributes["score"]
+
+
+def test_transform_unknown_dict_keeps_readable_json_text():
+    """Tests that unrecognized objects are rendered with the stdlib's spacing."""
+    result = transform_llm_extractions([{"a": 1, "b": "é"}])
+
+    assert result[0]["extraction_class"] == "unknown"
+    assert result[0]["extraction_text"] == '{"a": 1, "b": "é"}'
@@ -0,0 +1,24 @@
+# tests/test_providers.py
+
+from unittest.mock import patch
+
+from llmextract.providers import get_llm_provider
+
+
+@patch("llmextract.providers._build_llm_provider")
+def test_get_llm_provider_reuse_returns_same_instance(mock_build):
+    """
+    Verifies that reuse=True builds a model once per (model, kwargs) pair.
+    """
+    mock_build.side_effect = lambda *args, **kwargs: object()
+    kwargs = {"provider": "ollama", "default_headers": {"X-Test": "1"}}
+
+    first = get_llm_provider("reuse-model", kwargs, reuse=True)
+    second = get_llm_provider("reuse-model", dict(kwargs), reuse=True)
+    other = get_llm_provider("reuse-model", {"provider": "ollama"}, reuse=True)
+    fresh = get_llm_provider("reuse-model", kwargs)
+
+    assert first is second
+    assert other is not first
+    assert fresh is not first
+    assert mock_build.call_count == 3
@@ -1,9 +1,11 @@
 # tests/test_services.py
 
-from unittest.mock import MagicMock, patch
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
 
 # Update the import to reflect the new structure
-from llmextract.services import extract
+from llmextract.services import aextract, extract
 from llmextract.data_models import ExampleData, Extraction
 
 
@@ -51,3 +53,192 @@ def test_extract_end_to_end_mocked(mock_get_provider):
     assert extraction.char_interval.end == 22
 
     print("\nTest passed: Mocked end-to-end extraction successful.")
+
+
+@patch("llmextract.services.get_llm_provider")
+def test_extract_cache_reuses_llm_response(mock_get_provider):
+    """
+    Verifies that cache=True answers a repeated extraction without calling the LLM.
+    """
+    mock_llm = MagicMock()
+    mock_response = MagicMock()
+    mock_response.content = (
+        '{"extractions": [{"extraction_class": "fruit", "extraction_text": "kiwi"}]}'
+    )
+    mock_llm.invoke.return_value = mock_response
+    mock_get_provider.return_value = mock_llm
+
+    text = "A kiwi a day keeps the cache warm."
+    kwargs = dict(model_name="mock-cache-model", chunk_size=100, chunk_overlap=20)
+
+    first = extract(text, "Extract fruits.", [], cache=True, **kwargs)
+    second = extract(text, "Extract fruits.", [], cache=True, **kwargs)
+
+    assert mock_llm.invoke.call_count == 1
+    assert [e.extraction_text for e in first.extractions] == ["kiwi"]
+    assert [e.extraction_text for e in second.extractions] == ["kiwi"]
+    assert second.extractions[0].char_interval is not None
+    assert second.extractions[0].char_interval.start == 2
+
+
+@patch("llmextract.services.get_llm_provider")
+def test_extract_cache_is_keyed_on_provider_settings(mock_get_provider):
+    """
+    Verifies that cache=True does not share responses across endpoints.
+    """
+    mock_llm = MagicMock()
+    mock_response = MagicMock()
+    mock_response.content = (
+        '{"extractions": [{"extraction_class": "fruit", "extraction_text": "lime"}]}'
+    )
+    mock_llm.invoke.return_value = mock_response
+    mock_get_provider.return_value = mock_llm
+
+    text = "A lime for every endpoint."
+    kwargs = dict(model_name="mock-endpoint-model", chunk_size=100, chunk_overlap=20)
+
+    for base_url in ("http://a.example/v1", "http://b.example/v1"):
+        extract(
+            text,
+            "Extract fruits.",
+            [],
+            cache=True,
+            provider_kwargs={"base_url": base_url, "api_key": "sk-secret"},
+            **kwargs,
+        )
+
+    assert mock_llm.invoke.call_count == 2
+
+
+@patch("llmextract.services.get_llm_provider")
+def test_extract_sends_identical_chunks_once(mock_get_provider):
+    """
+    Verifies that repeated chunk text is sent to the LLM once and its
+    extractions are replicated at each occurrence.
+    """
+    mock_llm = MagicMock()
+    mock_response = MagicMock()
+    mock_response.content = (
+        '{"extractions": [{"extraction_class": "fruit", "extraction_text": "pear"}]}'
+    )
+    mock_llm.invoke.return_value = mock_response
+    mock_get_provider.return_value = mock_llm
+
+    text = "ripe pear." * 3
+
+    result = extract(
+        text,
+        "Extract fruits.",
+        [],
+        model_name="mock-model",
+        chunk_size=10,
+        chunk_overlap=0,
+    )
+
+    assert mock_llm.invoke.call_count == 1
+    starts = sorted(
+        e.char_interval.start for e in result.extractions if e.char_interval
+    )
+    assert starts == [5, 15, 25]
+    assert result.metadata["num_chunks"] == 3
+
+
+@patch("llmextract.services.get_llm_provider")
+def test_extract_returns_extractions_in_document_order(mock_get_provider):
+    """
+    Verifies that extractions follow chunk order even when later chunks finish first.
+    """
+    fruits = ["fig", "yam", "kiwi"]
+
+    def _invoke(messages):
+        prompt = messages[0].content
+        fruit = next(f for f in fruits if f" {f}." in prompt)
+        time.sleep(0.05 * (len(fruits) - fruits.index(fruit)))
+        response = MagicMock()
+        response.content = (
+            '{"extractions": [{"extraction_class": "fruit", '
+            f'"extraction_text": "{fruit}"}}]}}'
+        )
+        return response
+
+    mock_llm = MagicMock()
+    mock_llm.invoke.side_effect = _invoke
+    mock_get_provider.return_value = mock_llm
+
+    text = "".join(f"eat {f}.".ljust(10) for f in fruits)
+
+    result = extract(
+        text,
+        "Extract fruits.",
+        [],
+        model_name="mock-model",
+        chunk_size=10,
+        chunk_overlap=0,
+    )
+
+    assert [e.extraction_text for e in result.extractions] == fruits
+
+
+@patch("llmextract.services.get_llm_provider")
+def test_aextract_provides_and_closes_async_http_client(mock_get_provider):
+    """
+    Verifies that aextract passes its own pooled async client to the provider
+    (kept out of metadata) and closes it afterwards.
+    """
+    mock_llm = MagicMock()
+    mock_response = MagicMock()
+    mock_response.content = (
+        '{"extractions": [{"extraction_class": "fruit", "extraction_text": "plum"}]}'
+    )
+    mock_llm.ainvoke = AsyncMock(return_value=mock_response)
+    mock_get_provider.return_value = mock_llm
+
+    result = asyncio.run(
+        aextract(
+            "A plum fell.",
+            "Extract fruits.",
+            [],
+            model_name="mock-model",
+            provider_kwargs={"provider": "openrouter"},
+        )
+    )
+
+    client = mock_get_provider.call_args[0][1]["http_async_client"]
+    assert client.is_closed
+    assert "http_async_client" not in result.metadata
+    assert [e.extraction_text for e in result.extractions] == ["plum"]
+
+
+def _word_echo_response(prompt):
+    word = "aaaaa" if "'''\naaaaa" in prompt else "bbbbb"
+    response = MagicMock()
+    response.content = (
+        '{"extractions": [{"extraction_class": "word", '
+        f'"extraction_text": "{word}"}}]}}'
+    )
+    return response
+
+
+@patch("llmextract.services.get_llm_provider")
+def test_duplicate_chunk_extractions_keep_document_order(mock_get_provider):
+    """
+    Verifies that copies made for repeated chunks are placed at the duplicate's
+    position in the output, for both extract and aextract.
+    """
+    mock_llm = MagicMock()
+    mock_llm.invoke.side_effect = lambda messages: _word_echo_response(
+        messages[0].content
+    )
+    mock_llm.ainvoke = AsyncMock(
+        side_effect=lambda messages: _word_echo_response(messages[0].content)
+    )
+    mock_get_provider.return_value = mock_llm
+
+    text = "aaaaa bbbbb aaaaa "
+    kwargs = dict(model_name="mock-model", chunk_size=6, chunk_overlap=0)
+
+    sync_result = extract(text, "Extract words.", [], **kwargs)
+    async_result = asyncio.run(aextract(text, "Extract words.", [], **kwargs))
+
+    for result in (sync_result, async_result):
+        assert [e.char_interval.start for e in result.extractions] == [0, 6, 12]
@@ -0,0 +1,74 @@
+# tests/test_visualization.py
+
+import json
+
+from llmextract.data_models import AnnotatedDocument, Extraction
+from llmextract.visualization import _tooltip_html, visualize
+
+
+def test_tooltip_html_escapes_class_and_attributes():
+    """Tests that tooltips are pre-rendered with escaped class names and attributes."""
+    ext = Extraction(
+        extraction_class="drug<x>",
+        extraction_text="aspirin",
+        attributes={"dose": "81 mg", "flags": [1, "&"], "otc": True, "note": None},
+    )
+
+    assert _tooltip_html(ext) == (
+        "<strong>drug&lt;x&gt;</strong>"
+        '<hr style="margin:4px 0; border-color:#555;">'
+        "<div><em>dose</em>: 81 mg</div>"
+        "<div><em>flags</em>: [1,&quot;&amp;&quot;]</div>"
+        "<div><em>otc</em>: true</div>"
+        "<div><em>note</em>: null</div>"
+    )
+
+
+def test_visualize_embedded_json_is_script_safe_and_parseable():
+    """Tests that script-closing and comment sequences are escaped reversibly."""
+    doc = AnnotatedDocument(
+        text="x",
+        metadata={"doc_id": "d", "model_name": "m", "note": "</script><!-- hi"},
+    )
+
+    page = visualize(doc)
+    start = page.index('id="llmextract-data">') + len('id="llmextract-data">')
+    embedded = page[start : page.index("</script>", start)]
+
+    assert "<!--" not in embedded
+    assert json.loads(embedded)["d"]["m"]["metadata"]["note"] == "</script><!-- hi"
+
+
+def test_visualize_output_contains_no_nul_bytes():
+    """Tests that escape sequences in the JS template survive as text, not raw bytes."""
+    page = visualize(AnnotatedDocument(text="x"))
+
+    assert "\0" not in page
+
+
+def test_visualize_embeds_metadata_with_wide_integers():
+    """Tests that integers wider than 64 bits do not empty the embedded data."""
+    doc = AnnotatedDocument(
+        text="x", metadata={"doc_id": "d", "model_name": "m", "run": 2**70}
+    )
+
+    page = visualize(doc)
+    start = page.index('id="llmextract-data">') + len('id="llmextract-data">')
+    embedded = page[start : page.index("</script>", start)]
+
+    assert json.loads(embedded)["d"]["m"]["metadata"]["run"] == 2**70
+
+
+def test_visualize_escapes_script_end_tags_in_any_case():
+    """Tests that upper- and mixed-case script end tags are escaped, case preserved."""
+    note = "</SCRIPT> and </Script>"
+    doc = AnnotatedDocument(
+        text="x", metadata={"doc_id": "d", "model_name": "m", "note": note}
+    )
+
+    page = visualize(doc)
+    start = page.index('id="llmextract-data">') + len('id="llmextract-data">')
+    embedded = page[start : page.index("</script>", start)]
+
+    assert "</" not in embedded
+    assert json.loads(embedded)["d"]["m"]["metadata"]["note"] == note